@@ -0,0 +1,84 @@
+"""
+Measure the guide to EPG event transformation of the Pluto TV plugin.
+
+A synthetic guide for 400 channels covering 24 hours is generated and passed
+through PlutoGuideTransformer.  The best of several rounds is reported as
+events per second.
+
+Usage: python benchmarks/epg_transform.py [channels] [hours] [rounds]
+
+SPDX-License-Identifier: GPL-2.0-or-later
+"""
+
+from calendar import timegm
+from random import Random
+import sys
+from time import gmtime, perf_counter, strftime, time
+
+import stubs
+
+GENRES = ("Action & Adventure", "Children & Family", "Classics", "Comedy", "Documentaries", "Drama", "Horror", "Music", "News and Information", "Reality", "Sci-Fi & Fantasy", "Thrillers")
+DURATIONS = (900, 1800, 1800, 3600, 3600, 5400, 7200)
+
+
+def buildGuide(channels, hours, seed=2025):
+	random = Random(seed)
+	now = timegm(gmtime(time()))
+	start = now - now % 3600
+	guide = []
+	for channel in range(channels):
+		timelines = []
+		begin = start
+		show = 0
+		while begin < start + hours * 3600:
+			duration = random.choice(DURATIONS)
+			series = random.randrange(12)  # Channels repeat a small number of shows.
+			timelines.append({
+				"_id": f"{channel:08x}{show:08x}",
+				"start": strftime("%Y-%m-%dT%H:%M:%S.000Z", gmtime(begin)),
+				"stop": strftime("%Y-%m-%dT%H:%M:%S.000Z", gmtime(begin + duration)),
+				"title": f"Show {series}",
+				"episode": {
+					"_id": f"{channel:08x}{series:04x}{show:04x}",
+					"name": f"Episode {show % 20}",
+					"number": show % 20,
+					"season": 1 + series % 4,
+					"description": f"The plot of episode {show % 20} of show {series}.",
+					"duration": duration * 1000,
+					"genre": GENRES[(channel + series) % len(GENRES)],
+					"subGenre": "Drama",
+					"rating": ("", "12", "16", "Not Rated", "TV-14")[series % 5],
+					"series": {
+						"_id": f"{channel:08x}{series:08x}",
+						"name": f"Series {series} on channel {channel}",
+						"type": ("tv", "film")[series % 2],
+						"description": f"The story of series {series}."
+					}
+				}
+			})
+			begin += duration
+			show += 1
+		guide.append({"_id": f"{channel:024x}", "name": f"Channel {channel}", "number": channel + 1, "summary": f"Channel {channel} summary.", "timelines": timelines})
+	return guide
+
+
+def main(channels=400, hours=24, rounds=5):
+	plugin = stubs.install()
+	guide = buildGuide(channels, hours)
+	timelines = sum(len(x["timelines"]) for x in guide)
+	print(f"Synthetic guide: {channels} channels, {hours} hours, {timelines} timeline entries.")
+	best = None
+	for count in range(rounds):
+		transformer = plugin.PlutoGuideTransformer()  # A new transformer for each round as each update uses a new one.
+		begin = perf_counter()
+		events = 0
+		for entry in guide:
+			events += len(transformer.transform(entry))
+		elapsed = perf_counter() - begin
+		best = elapsed if best is None else min(best, elapsed)
+		print(f"Round {count + 1}: {events} events in {elapsed:.3f}s, {events / elapsed:,.0f} events/sec.")
+	print(f"Best: {timelines / best:,.0f} events/sec.")
+
+
+if __name__ == "__main__":
+	main(*[int(x) for x in sys.argv[1:4]])
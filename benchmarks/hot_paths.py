@@ -0,0 +1,250 @@
+"""
+Micro-benchmarks of the hot paths of the Pluto TV plugin.
+
+Each case runs a plugin function against synthetic fixtures of several sizes
+using the enigma2 stubs.  The number of loops is calibrated so that each
+measurement takes a useful time and the best of several repeats is reported
+as operations per second.  The memory allocated by a single operation is
+measured separately with tracemalloc, as the peak traced memory, so that the
+tracing does not distort the timing.  The output of the plugin is discarded
+while measuring.
+
+Results are compared against the stored baseline file, which is replaced when
+"--save" is given.  Results from different machines can not be compared.
+
+Usage: python benchmarks/hot_paths.py [--save] [--baseline PATH] [--repeat N] [CASE ...]
+
+SPDX-License-Identifier: GPL-2.0-or-later
+"""
+
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+import gc
+from json import dump, load
+from os import devnull, makedirs
+from os.path import abspath, dirname, isfile, join
+from random import Random
+from time import perf_counter
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+
+import stubs
+from epg_transform import buildGuide
+
+BASELINE_PATH = join(dirname(abspath(__file__)), "baseline.json")
+MINIMUM_TIME = 0.2  # Seconds that each timed measurement should take.
+GENRES = ("Action & Adventure", "Comedy", "Documentaries", "Drama", "Horror", "Reality")
+NAMES = ("Alex Smith", "Sam Jones", "Kim Brown", "Lee Taylor", "Pat Wilson", "Chris Davies", "Jo Evans", "Max Thomas")
+
+
+class Menu:  # The parts of the enigma2 List source used by the Pluto TV screen.
+	def __init__(self):
+		self.entries = []
+		self.index = 0
+
+	def setList(self, entries):
+		self.entries = entries
+
+	def getCurrentIndex(self):
+		return self.index
+
+	def getCurrent(self):
+		return self.entries[self.index]
+
+
+def buildScreen(plugin):  # Return a Pluto TV screen with only the state used by the benchmarked methods.
+	screen = plugin.PlutoTV.__new__(plugin.PlutoTV)
+	stubs.Screen.__init__(screen)
+	for widget in ("key_green", "key_red", "key_yellow", "loading", "name", "poster", "footnote", "menuActions", "movieDbAction", "favoriteAction", "previousMenuAction"):
+		screen[widget] = stubs.Anything()
+	screen["details"] = plugin.PlutoLabel()
+	screen["menu"] = Menu()
+	screen.baseTitle = "Pluto TV"
+	screen.region = "DE"
+	screen.history = []
+	screen.categories = {}
+	screen.categoryMenu = []
+	screen.films = []
+	screen.episodes = {}
+	screen.favorites = {"DE": {}}
+	screen.postersToDownload = []
+	screen.posterTimer = stubs.eTimer()
+	screen.seasonText = "Season"
+	screen.timings = plugin.PlutoTimings()
+	return screen
+
+
+def buildClip(random, people):
+	return {
+		"actors": [random.choice(NAMES) for x in range(people)],
+		"writers": [random.choice(NAMES) for x in range(max(people // 4, 1))],
+		"directors": [random.choice(NAMES)],
+		"producers": [random.choice(NAMES) for x in range(max(people // 8, 1))],
+		"originalReleaseDate": "2019-05-17T00:00:00Z"
+	}
+
+
+def buildCarousel(categories, items, seed=2025):  # Return a VOD carousel as returned by Pluto TV.
+	random = Random(seed)
+	carousel = {"totalCategories": str(categories), "categories": []}
+	for category in range(categories):
+		entries = []
+		for item in range(items):
+			mediaType = ("movie", "series")[item % 2]
+			entries.append({
+				"_id": f"{category:08x}{item:016x}",
+				"name": f"Title {item} of category {category}",
+				"summary": f"The summary of title {item}.",
+				"description": f"A longer description of title {item} in category {category}.",
+				"genre": random.choice(GENRES),
+				"rating": ("12", "16", "TV-14", "Not Rated")[item % 4],
+				"duration": str(random.choice((1800, 3600, 5400)) * 1000),
+				"type": mediaType,
+				"stitched": {"urls": [{"type": "hls", "url": f"https://service-stitcher.clusters.pluto.tv/v1/stitch/embed/hls/episode/{item:016x}/master.m3u8"}]} if mediaType == "movie" else {},
+				"covers": [{"aspectRatio": ratio, "url": f"https://images.pluto.tv/v3/images/episodes/{item:016x}/{ratio}.jpg"} for ratio in ("347:500", "16:9", "4:3")],
+				"seasonsNumbers": [1, 2, 3] if mediaType == "series" else [],
+				"clip": buildClip(random, 4)
+			})
+		carousel["categories"].append({"_id": f"{category:024x}", "name": f"Category {category}", "totalItemsCount": str(items), "items": entries})
+	return carousel
+
+
+def caseUpdateQuery(plugin, size):
+	url = f"https://service-stitcher.clusters.pluto.tv/v1/stitch/embed/hls/episode/0123456789abcdef/master.m3u8?{"&".join(f"key{x}=value{x}" for x in range(size))}"
+	queryData = {"deviceId": "0123456789abcdef", "sid": "fedcba9876543210", "deviceType": "web", "deviceMake": "Firefox", "deviceModel": "Firefox", "appName": "web"}
+	return lambda: plugin.updateQuery(url, queryData)
+
+
+def caseBuildHeader(plugin, size):
+	addresses = [f"10.{x // 256 % 256}.{x % 256}.1" for x in range(size)]
+	return lambda: [plugin.buildHeader(x) for x in addresses]
+
+
+def caseBuildMenuEntry(plugin, size):
+	screen = buildScreen(plugin)
+	menuTypes = ("movie", "series", "seasons", "episode", "menu")
+	entries = [(f"{x:024x}", f"Title {x}", menuTypes[x % len(menuTypes)], x % 7 or "") for x in range(size)]
+	return lambda: [screen.buildMenuEntry(*x) for x in entries]
+
+
+def caseSelectionChanged(plugin, size):  # The size is the number of cast members.
+	random = Random(2025)
+	screen = buildScreen(plugin)
+	film = ["0123456789abcdef01234567", "A film", "The summary of the film.", "A longer description.", "Drama", "FSK-12", 5400, "https://images.pluto.tv/v3/images/episodes/0123456789abcdef/poster.jpg", "", "movie", "", [], buildClip(random, size), False]
+	screen.films = [tuple(film)]
+	screen["menu"].setList([screen.buildMenuEntry(film[0], film[1], "movie")])
+
+	def selectionChanged():
+		screen.selectionChanged()
+		screen.postersToDownload.clear()
+
+	return selectionChanged
+
+
+def caseShowCategories(plugin, size):  # The size is the number of items in each of 20 categories.
+	screen = buildScreen(plugin)
+	carousel = buildCarousel(20, size)
+	return lambda: screen.showCategories(carousel)
+
+
+def caseGuideTransform(plugin, size):  # The size is the number of channels with 24 hours of guide.
+	guide = buildGuide(size, 24)
+
+	def transform():
+		transformer = plugin.PlutoGuideTransformer()
+		for entry in guide:
+			transformer.transform(entry)
+
+	return transform
+
+
+CASES = {  # Name: (Case builder, Sizes).
+	"updateQuery": (caseUpdateQuery, (0, 8, 32)),
+	"buildHeader": (caseBuildHeader, (1, 10, 100)),
+	"buildMenuEntry": (caseBuildMenuEntry, (10, 100, 1000)),
+	"selectionChanged": (caseSelectionChanged, (2, 20, 100)),
+	"showCategories": (caseShowCategories, (5, 25, 100)),
+	"guideTransform": (caseGuideTransform, (10, 50, 200))
+}
+
+
+def timeOperation(operation, repeat):  # Return the best operations per second.
+	loops = 1
+	while True:
+		begin = perf_counter()
+		for loop in range(loops):
+			operation()
+		elapsed = perf_counter() - begin
+		if elapsed >= MINIMUM_TIME:
+			break
+		loops *= 2 if elapsed < MINIMUM_TIME / 10 else max(int(MINIMUM_TIME / elapsed) + 1, 2)
+	best = elapsed
+	gcEnabled = gc.isenabled()
+	gc.disable()
+	try:
+		for count in range(repeat - 1):
+			begin = perf_counter()
+			for loop in range(loops):
+				operation()
+			best = min(best, perf_counter() - begin)
+	finally:
+		if gcEnabled:
+			gc.enable()
+	return loops / best
+
+
+def measureAllocation(operation):  # Return the peak bytes allocated by a single operation.
+	operation()  # Leave any caches filled by the first call out of the measurement.
+	gc.collect()
+	start()
+	try:
+		base = get_traced_memory()[0]
+		reset_peak()
+		operation()
+		return get_traced_memory()[1] - base
+	finally:
+		stop()
+
+
+def main():
+	parser = ArgumentParser(description="Run the Pluto TV hot path micro-benchmarks.")
+	parser.add_argument("cases", nargs="*", help=f"the cases to run from {", ".join(CASES)}, all cases by default")
+	parser.add_argument("--baseline", default=BASELINE_PATH, help="the baseline file to compare against")
+	parser.add_argument("--repeat", type=int, default=5, help="the number of timed repeats of each measurement")
+	parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+	args = parser.parse_args()
+	unknown = [x for x in args.cases if x not in CASES]
+	if unknown:
+		parser.error(f"unknown case(s) {", ".join(unknown)}")
+	plugin = stubs.install()
+	plugin.loadRegions()
+	plugin.PLUTO_FOLDER = stubs.scratch("PlutoTV")
+	makedirs(plugin.PLUTO_FOLDER, exist_ok=True)
+	baseline = {}
+	if isfile(args.baseline):
+		with open(args.baseline) as fd:
+			baseline = load(fd)
+	results = dict(baseline) if args.save else {}
+	print(f"{"Case":<26} {"Ops/sec":>12} {"Baseline":>12} {"Change":>8} {"Alloc KB/op":>12} {"Baseline":>10}")
+	for name in args.cases or CASES:
+		builder, sizes = CASES[name]
+		for size in sizes:
+			key = f"{name}[{size}]"
+			with open(devnull, "w") as quiet, redirect_stdout(quiet):  # The log lines of the plugin would measure the terminal.
+				operation = builder(plugin, size)
+				opsPerSecond = timeOperation(operation, args.repeat)
+				allocated = measureAllocation(operation) / 1024
+			results[key] = {"ops": round(opsPerSecond, 1), "kb": round(allocated, 1)}
+			previous = baseline.get(key)
+			if previous:
+				print(f"{key:<26} {opsPerSecond:>12,.1f} {previous["ops"]:>12,.1f} {(opsPerSecond / previous["ops"] - 1) * 100:>+7.1f}% {allocated:>12,.1f} {previous["kb"]:>10,.1f}")
+			else:
+				print(f"{key:<26} {opsPerSecond:>12,.1f} {"-":>12} {"-":>8} {allocated:>12,.1f} {"-":>10}")
+	if args.save:
+		with open(args.baseline, "w") as fd:
+			dump(results, fd, indent=1, sort_keys=True)
+			fd.write("\n")
+		print(f"Baseline saved to '{args.baseline}'.")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,59 @@
+"""
+Measure the time taken to import the Pluto TV plugin and start its session hook.
+
+Each round runs in a new interpreter.  Twisted is imported before the timing
+starts as enigma2 has always loaded it before any plugin.  The import of the
+plugin module, the Plugins() call, the start of the scheduler and the first
+use of the region data are timed separately and the best of the rounds is
+reported, together with the slow modules that the import pulled in.
+
+Usage: python benchmarks/import_time.py [rounds]
+
+SPDX-License-Identifier: GPL-2.0-or-later
+"""
+
+from json import dumps, loads
+from subprocess import check_output
+import sys
+from time import perf_counter
+
+SLOW_MODULES = ("requests", "pickle", "unicodedata", "uuid", "xml.etree.ElementTree")
+STEPS = ("import", "Plugins()", "scheduler", "first use")
+
+
+def measure():  # Time a single round, this runs in its own interpreter.
+	import twisted.internet.reactor  # noqa: F401
+	import twisted.internet.threads  # noqa: F401
+	import twisted.python.threadpool  # noqa: F401
+	import stubs
+	preloaded = set(sys.modules)
+	begin = perf_counter()
+	plugin = stubs.install()
+	imported = perf_counter()
+	plugin.Plugins()
+	described = perf_counter()
+	plugin.plutoScheduler.start()
+	started = perf_counter()
+	plugin.loadRegions()
+	plugin.deviceIdentifier()
+	used = perf_counter()
+	loaded = [x for x in SLOW_MODULES if x in sys.modules and x not in preloaded]
+	return {"times": [imported - begin, described - imported, started - described, used - started], "modules": loaded}
+
+
+def main(rounds=10):
+	best = None
+	for count in range(rounds):
+		result = loads(check_output([sys.executable, __file__, "--round"], text=True).splitlines()[-1])
+		times = result["times"]
+		best = times if best is None else [min(x, y) for x, y in zip(best, times)]
+		print(f"Round {count + 1}: {", ".join(f"{x} {y * 1000:.1f}ms" for x, y in zip(STEPS, times))}.")
+	print(f"Best: {", ".join(f"{x} {y * 1000:.1f}ms" for x, y in zip(STEPS, best))}.")
+	print(f"Slow modules loaded by the import: {", ".join(result["modules"]) or "None"}.")
+
+
+if __name__ == "__main__":
+	if sys.argv[1:2] == ["--round"]:
+		print(dumps(measure()))
+	else:
+		main(*[int(x) for x in sys.argv[1:2]])
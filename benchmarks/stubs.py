@@ -0,0 +1,227 @@
+"""
+Minimal stand-ins for the enigma2 modules used by the Pluto TV plugin.
+
+These stubs only provide enough of the enigma2 API for the plugin module to be
+imported and for its update code to be driven off the receiver.  Nothing here
+draws a screen.  File system locations used by enigma2 are redirected into a
+scratch directory, and every event handed to eEPGCache.importEvents() is
+counted rather than stored.
+
+SPDX-License-Identifier: GPL-2.0-or-later
+"""
+
+import builtins
+from os import makedirs
+from os.path import abspath, dirname, join
+import sys
+from tempfile import mkdtemp
+from types import ModuleType
+from xml.etree.ElementTree import parse
+
+SOURCE_PATH = join(dirname(dirname(abspath(__file__))), "src")
+PLUGIN_PATH = join(SOURCE_PATH, "PlutoTV")
+SCRATCH_PATH = mkdtemp(prefix="plutotv-benchmark-")
+
+
+def scratch(path):
+	return join(SCRATCH_PATH, path.lstrip("/"))
+
+
+class Anything:
+	def __init__(self, *args, **kwargs):
+		pass
+
+	def __call__(self, *args, **kwargs):
+		return Anything()
+
+	def __getattr__(self, name):
+		return Anything()
+
+
+class ConfigElement:
+	def __init__(self, default=None, choices=None, **kwargs):
+		if isinstance(default, str) and default.startswith("/usr/share/enigma2"):
+			default = scratch(default)
+		self.value = default
+		self.default = default
+		self.choices = choices
+
+	def save(self):
+		pass
+
+	def getSelectionList(self):
+		return self.choices
+
+	def setSelectionList(self, choices):
+		self.choices = choices
+
+
+class ConfigSubsection:
+	pass
+
+
+class ConfigSubList(list):
+	def save(self):
+		pass
+
+
+config = ConfigSubsection()
+config.plugins = ConfigSubsection()
+config.usage = ConfigSubsection()
+config.usage.multibouquet = ConfigElement(True)
+config.usage.date = ConfigSubsection()
+config.usage.date.daylong = ConfigElement("%A %d %B %Y")
+config.misc = ConfigSubsection()
+
+
+class eEPGCache:
+	instance = None
+	events = 0
+	imports = 0
+
+	@staticmethod
+	def getInstance():
+		return eEPGCache.instance
+
+	def importEvents(self, serviceReference, events):
+		eEPGCache.events += len(events)
+		eEPGCache.imports += 1
+
+
+eEPGCache.instance = eEPGCache()
+
+
+class eDVBDB:
+	instance = None
+
+	@staticmethod
+	def getInstance():
+		return eDVBDB.instance
+
+	def reloadServicelist(self):
+		pass
+
+	def reloadBouquets(self):
+		pass
+
+
+eDVBDB.instance = eDVBDB()
+
+
+class eTimer:
+	def __init__(self):
+		self.callback = []
+
+	def start(self, *args):
+		pass
+
+	def startLongTimer(self, *args):
+		pass
+
+	def stop(self):
+		pass
+
+
+class PluginDescriptor:
+	WHERE_EXTENSIONSMENU = "extensionsmenu"
+	WHERE_MENU = "menu"
+	WHERE_PLUGINMENU = "pluginmenu"
+	WHERE_SESSIONSTART = "sessionstart"
+
+	def __init__(self, *args, **kwargs):
+		pass
+
+
+class Screen(dict):  # Widgets are held by name as in enigma2.
+	def __init__(self, session=None, *args, **kwargs):
+		dict.__init__(self)
+		self.session = session
+		self.title = ""
+
+	def getTitle(self):
+		return self.title
+
+	def setTitle(self, title):
+		self.title = title
+
+
+def resolveFilename(scope, path=""):
+	return join(PLUGIN_PATH, path) if scope == "plugin" else scratch(join("etc/enigma2", path))
+
+
+def fileReadXML(path, default=None, source=None):
+	try:
+		return parse(path).getroot()
+	except Exception:
+		return default
+
+
+def fileReadLine(path, default=None, source=None):
+	try:
+		with open(path) as fd:
+			return fd.readline().rstrip("\n")
+	except OSError:
+		return default
+
+
+def fileReadLines(path, default=None, source=None):
+	try:
+		with open(path) as fd:
+			return fd.read().splitlines()
+	except OSError:
+		return default
+
+
+def fileWriteLine(path, line, source=None):
+	with open(path, "w") as fd:
+		fd.write(line)
+	return 1
+
+
+def fileWriteLines(path, lines, source=None):
+	with open(path, "w") as fd:
+		fd.write("\n".join(lines))
+	return 1
+
+
+def addModule(name, **attributes):
+	module = ModuleType(name)
+	module.__dict__.update(attributes)
+	sys.modules[name] = module
+	return module
+
+
+def install():  # Install the stubs and return the imported plugin module.
+	makedirs(scratch("etc/enigma2"), exist_ok=True)
+	builtins._ = lambda text: text
+	builtins.ngettext = lambda singular, plural, count: singular if count == 1 else plural
+	addModule("enigma", eDVBDB=eDVBDB, eEPGCache=eEPGCache, ePicLoad=Anything, eServiceCenter=Anything, eServiceReference=Anything, eTimer=eTimer, gRGB=Anything, iPlayableService=Anything(), iRecordableService=Anything(), eActionMap=Anything)
+	addModule("skin", parseColor=lambda *args, **kwargs: 0)
+	addModule("Components")
+	addModule("Components.ActionMap", HelpableActionMap=Anything)
+	addModule("Components.config", ConfigDirectory=ConfigElement, ConfigNumber=ConfigElement, ConfigSelection=ConfigElement, ConfigSubList=ConfigSubList, ConfigSubsection=ConfigSubsection, ConfigYesNo=ConfigElement, config=config, getConfigListEntry=lambda *args: args)
+	addModule("Components.Label", Label=Anything)
+	addModule("Components.Language", language=Anything())
+	addModule("Components.Pixmap", Pixmap=Anything)
+	addModule("Components.ProgressBar", ProgressBar=Anything)
+	addModule("Components.ServiceEventTracker", ServiceEventTracker=Anything)
+	addModule("Components.Sources")
+	addModule("Components.Sources.List", List=Anything)
+	addModule("Components.Sources.StaticText", StaticText=Anything)
+	addModule("Plugins")
+	addModule("Plugins.Extensions")
+	addModule("Plugins.Plugin", PluginDescriptor=PluginDescriptor)
+	addModule("Screens")
+	addModule("Screens.InfoBar", InfoBar=Anything, MoviePlayer=object)
+	addModule("Screens.MessageBox", MessageBox=Anything)
+	addModule("Screens.Screen", Screen=Screen)
+	addModule("Screens.Setup", Setup=object)
+	addModule("Screens.Standby", inStandby=None)
+	addModule("Tools")
+	addModule("Tools.Directories", SCOPE_CONFIG="config", SCOPE_GUISKIN="skin", SCOPE_PLUGIN_ABSOLUTE="plugin", SCOPE_PLUGINS="plugins", fileReadLine=fileReadLine, fileReadLines=fileReadLines, fileReadXML=fileReadXML, fileWriteLine=fileWriteLine, fileWriteLines=fileWriteLines, resolveFilename=resolveFilename)
+	addModule("Tools.LoadPixmap", LoadPixmap=Anything)
+	addModule("Tools.Notifications", AddNotificationWithCallback=Anything)
+	package = addModule("PlutoTV", _=lambda text: text, __version__="benchmark")
+	package.__path__ = [PLUGIN_PATH]
+	from PlutoTV import plugin
+	return plugin
@@ -0,0 +1,204 @@
+"""
+Parse and transform Pluto TV guide data outside of enigma2.
+
+This module only uses the standard library so that it can be run as its own
+low priority process by the Pluto TV plugin.  The process reads the path of
+a fetched guide window, the identifiers of the channels in the bouquet and
+the translated texts from stdin as a pickle.  It writes a length prefixed
+pickle of (Channel identifier, Name, Events) to stdout for each channel as
+it is transformed.  Messages are written to stderr, which is the enigma2 log.
+
+The plugin also imports the transformer and the JSON array reader from here
+when the guide is processed in the enigma2 process.
+
+SPDX-License-Identifier: GPL-2.0-or-later
+See LICENSES/README.md for more information.
+"""
+
+from calendar import timegm
+from json import JSONDecodeError, JSONDecoder
+from operator import itemgetter
+from os import SCHED_IDLE, nice, sched_param, sched_setscheduler
+from pickle import dumps, load
+import sys
+from traceback import format_exc
+
+PLUTO_PROCESS_NICE = 19  # CPU niceness of the guide process when the idle scheduling policy is not available.
+
+
+class PlutoGuideTransformer:  # Convert Pluto TV guide entries into eEPGCache events, one transformer is used for a whole update.
+	GENRE_RULES = (  # The DVB content type of the first matching rule is used for a genre.
+		(0x10, ("Classics", "Romance", "Thrillers", "Horror"), ("Sci-Fi", "Action")),
+		(0x20, (), ("News", "Educational")),
+		(0x30, ("Comedy",), ()),
+		(0x50, (), ("Children",)),
+		(0x60, ("Music",), ()),
+		(0xA0, ("Documentaries",), ())
+	)
+
+	def __init__(self, ratingText="Rating", seasonText="Season, episode"):  # The plugin passes the translated texts.
+		self.ratingText = ratingText
+		self.seasonText = seasonText
+		self.genres = {}  # Genre: DVB content type.
+		self.days = {}  # Date: Seconds since the epoch.
+		self.strings = {}  # Titles and plots are shared by all airings of the same show.
+
+	def startRegion(self):  # Airings are only shared within a region, so the strings of the previous region are dropped.
+		self.strings.clear()
+
+	def genreType(self, genre):
+		for contentType, names, fragments in self.GENRE_RULES:
+			if genre in names or any(x in genre for x in fragments):
+				break
+		else:
+			contentType = 0
+		self.genres[genre] = contentType
+		return contentType
+
+	def parseTime(self, timestamp):  # Timestamps are always in the format "YYYY-MM-DDTHH:MM:SS.fffZ".
+		day = self.days.get(timestamp[:10])
+		if day is None:
+			day = timegm((int(timestamp[:4]), int(timestamp[5:7]), int(timestamp[8:10]), 0, 0, 0, 0, 0, 0))
+			self.days[timestamp[:10]] = day
+		return day + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+
+	def transform(self, guide):  # Return the start sorted events of a guide entry.
+		events = []
+		genres = self.genres
+		intern = self.strings.setdefault
+		parseTime = self.parseTime
+		ratingText = self.ratingText
+		seasonText = self.seasonText
+		guidePlot = guide.get("description", "") or guide.get("summary", "")
+		timelines = guide.get("timelines", [])
+		# print(f"[PlutoTV] DEBUG: timelines={len(timelines)}.")
+		for timeline in timelines:
+			# identifier = timeline.get("_id", "")
+			# start = timeline.get("start", "")
+			# stop = timeline.get("stop", "")
+			# title = timeline.get("title", "")
+			# episode = timeline.get("episode", {})
+			#
+			# Episode data:
+			# identifier = episode.get("_id", "")
+			# number = episode.get("number", 0)
+			# season = episode.get("season", 0)
+			# description = episode.get("description", "")
+			# duration = episode.get("duration", 0)
+			# originalContentDuration = episode.get("originalContentDuration", 0)
+			# genre = episode.get("genre", "")
+			# subGenre = episode.get("subGenre", "")
+			# distributeAs = episode.get("distributeAs", {})  # Typical key is AVOD which is a Boolean.
+			# clip = episode.get("clip", {})  # Typically keys "actors"[], "writers"[], "directors"[], producers"[] and "originalReleaseDate".
+			# rating = episode.get("rating", "")
+			# name = episode.get("name", "")
+			# slug = episode.get("slug", "")
+			# poster = episode.get("poster", {})  # Typically key "path" as a URL to a background or promotional image.
+			# firstAired = episode.get("firstAired", "")
+			# thumbnail = episode.get("thumbnail", {})  # Typically key "path" as a URL to a background or promotional image.
+			# liveBroadcast = episode.get("liveBroadcast", False)
+			# featuredImage = episode.get("featuredImage", {})  # Typically key "path" as a URL to a background or promotional image.
+			# series = episode.get("series", {})
+			# ratingDescriptors = episode.get("ratingDescriptors", "")
+			# poster16_9 = episode.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
+			# cc = episode.get("cc", False)
+			#
+			# Series data:
+			# identifier = series.get("_id", "")
+			# name = series.get("name", "")
+			# slug = series.get("slug", "")
+			# type = series.get("type", "")
+			# tile = series.get("tile", {})  # Typically key "path" as a URL to a background or promotional image.
+			# description = series.get("description", "")
+			# summary = series.get("summary", "")
+			# displayName = series.get("displayName", "")
+			# featuredImage = series.get("featuredImage", {})  # Typically key "path" as a URL to a background or promotional image.
+			# poster16_9 = series.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
+			episode = timeline.get("episode", {}) or timeline
+			series = episode.get("series", {}) or timeline
+			duration = int(episode.get("duration", "0") or "0") // 1000  # In seconds.
+			start = parseTime(timeline["start"])
+			title = series.get("name", "") or episode.get("name", "") or timeline.get("title", "")
+			episodeSeason = episode.get("season", 0)
+			episodeNumber = episode.get("number", 0)
+			episodeType = series.get("type", "n/a")
+			episodeName = episode["name"]
+			episodeRating = episode.get("rating", "")
+			episodeGenre = episode.get("subGenre", "")
+			episodePlot = episode.get("description", "") or series.get("description", "") or series.get("summary", "") or guidePlot or episodeName
+			if episodeRating and "Not Rated" not in episodeRating:
+				episodePlot = f"{episodePlot}\n{ratingText}: {f"FSK-{episodeRating}" if episodeRating.isdigit() else episodeRating}"
+			if episodeType == "tv" and (episodeSeason > 0 and episodeNumber >= 0):
+				episodePlot = f"{episodeName}\n{episodeSeason}. {seasonText} {episodeNumber}: {episodePlot}"
+			elif episodeType == "film" and episodeGenre not in ("None", ""):
+				episodePlot = f"{episodeGenre}\n{episodePlot}"
+			genre = episode.get("genre", "")
+			genre = genres[genre] if genre in genres else self.genreType(genre)
+			# StartTime [long], Duration [int], EventTitle, ShortDescription, ExtendedDescription, EventType [byte], EventID [int], ParentalRatings [list of tuples (Country [3 letter string], ParentalRating [byte])]
+			events.append((start, duration, intern(title, title), "", intern(episodePlot, episodePlot), genre))
+		events.sort(key=itemgetter(0))
+		return events
+
+
+def iterJSONArray(fd, chunkSize=65536):  # Yield the items of a JSON array one at a time without reading the whole file.
+	decoder = JSONDecoder()
+	buffer = ""
+	position = 0
+	started = False
+	eof = False
+	while True:
+		while position < len(buffer) and buffer[position] in " \t\r\n,":
+			position += 1
+		if position < len(buffer):
+			if not started:
+				if buffer[position] != "[":
+					print("[PlutoTV] iterJSONArray Error: JSON data is not an array!")
+					return
+				started = True
+				position += 1
+				continue
+			if buffer[position] == "]":
+				return
+			try:
+				item, position = decoder.raw_decode(buffer, position)
+				yield item
+				continue
+			except JSONDecodeError as err:
+				if eof:
+					print(f"[PlutoTV] iterJSONArray Error: {err}!")
+					return
+		elif eof:
+			if started:
+				print("[PlutoTV] iterJSONArray Error: JSON array is not terminated!")
+			return
+		chunk = fd.read(chunkSize)
+		eof = not chunk
+		buffer = f"{buffer[position:]}{chunk}"
+		position = 0
+
+
+def main():
+	output = sys.stdout.buffer  # Only the frames are written to stdout.
+	sys.stdout = sys.stderr
+	try:
+		sched_setscheduler(0, SCHED_IDLE, sched_param(0))  # The idle policy also puts disk I/O into the idle class.
+	except OSError:
+		nice(PLUTO_PROCESS_NICE)
+	try:
+		guidePath, identifiers, ratingText, seasonText = load(sys.stdin.buffer)
+		transformer = PlutoGuideTransformer(ratingText, seasonText)
+		with open(guidePath, encoding="UTF-8") as fd:
+			for guide in iterJSONArray(fd):
+				identifier = guide.get("_id")
+				if identifier in identifiers:
+					data = dumps((identifier, guide.get("name"), transformer.transform(guide)), protocol=5)
+					output.write(len(data).to_bytes(4, "little") + data)
+		output.flush()
+	except Exception as err:
+		print(f"[PlutoTV] Error: Guide process failed!  ({err})\n{format_exc()}")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
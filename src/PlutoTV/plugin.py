@@ -53,20 +53,29 @@ PlutoTV.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 from calendar import timegm
-from os import makedirs, statvfs
-from os.path import exists, getsize, isdir, isfile, join
-from pickle import dump, load
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from functools import cache, partial
+from hashlib import sha1
+from math import ceil
+from os import link, listdir, makedirs, read, remove, replace, statvfs, symlink
+from os.path import basename, exists, getsize, isfile, join, lexists, samefile
+from pickle import dump, dumps, load, loads
+from random import uniform
 from re import sub
-from requests import get
-from shutil import copy2
-from time import gmtime, localtime, sleep, strftime, strptime, time
+from select import select
+from shutil import copy2, which
+from subprocess import PIPE, Popen
+from sys import executable
+from threading import Condition, Event, Lock, Thread, current_thread, main_thread
+from time import gmtime, localtime, monotonic, perf_counter, sleep, strftime, strptime, time
 from traceback import format_exc
 from twisted.internet import defer, reactor, threads
-from unicodedata import normalize
+from twisted.python.threadpool import ThreadPool
 from urllib.parse import parse_qsl, quote_plus, urljoin, urlparse
-from uuid import uuid4, uuid1
+from zlib import crc32
 
-from enigma import eDVBDB, eEPGCache, ePicLoad, eServiceCenter, eServiceReference, eTimer, gRGB, iPlayableService
+from enigma import eActionMap, eDVBDB, eEPGCache, ePicLoad, eServiceCenter, eServiceReference, eTimer, gRGB, iPlayableService, iRecordableService
 
 from skin import parseColor
 from Components.ActionMap import HelpableActionMap
@@ -92,7 +101,8 @@ try:
 	tmdbAvailable = True
 except ImportError:
 	tmdbAvailable = False
-from Screens.InfoBar import MoviePlayer
+from Screens import Standby
+from Screens.InfoBar import InfoBar, MoviePlayer
 from Screens.MessageBox import MessageBox
 from Screens.Screen import Screen
 from Screens.Setup import Setup
@@ -100,7 +110,8 @@ from Tools.Directories import SCOPE_CONFIG, SCOPE_GUISKIN, SCOPE_PLUGIN_ABSOLUTE
 from Tools.LoadPixmap import LoadPixmap
 from Tools.Notifications import AddNotificationWithCallback
 
-from . import _, __version__
+from . import _, __version__, guideprocess
+from .guideprocess import PlutoGuideTransformer, iterJSONArray
 
 MODULE_NAME = __name__.split(".")[-1]
 
@@ -116,8 +127,62 @@ PLUTO_FOLDER = "/tmp"
 PLUTO_TIMER_PATH = "/etc/enigma2/PlutoTV_timer"
 PLUTO_SERVICE_NUMBER_PATH = "/etc/enigma2/PlutoTV_numbers"
 
-SID1_HEX = str(uuid4().hex)  # Defined as a global to save time.
-DEVICEID1_HEX = str(uuid1().hex)  # Defined as a global to save time.
+PLUTO_WORKER_PRIORITY = 0
+PLUTO_WORKER_SIZE = 1
+PLUTO_WORKERS = {  # Lower priority values are served first, background workers yield to them.
+	"interactive": (0, 2),  # Posters and seasons requested while browsing.
+	"picons": (1, 4),  # Picon downloads during bouquet updates.
+	"update": (2, 1),  # Background and manual bouquet/EPG updates.
+	"backfill": (3, 1),  # Full EPG window fetched after the now/next EPG, yields to everything else.
+	"fetch": (2, 4)  # Update requests that are waited on so that a stalled connection can't hold up an abort.
+}
+PLUTO_WORKER_YIELD = 2.0  # Maximum seconds a worker will wait for higher priority work to finish.
+PLUTO_CONNECT_TIMEOUT = 5.0  # Maximum seconds to connect to a server.
+PLUTO_READ_TIMEOUT = 20.0  # Maximum seconds to wait for more data from a server.
+PLUTO_TIMEOUT = (PLUTO_CONNECT_TIMEOUT, PLUTO_READ_TIMEOUT)
+PLUTO_ABORT_POLL = 0.5  # Seconds between checks for an abort while waiting for a request.
+PLUTO_SHUTDOWN_WAIT = 5  # Maximum seconds enigma2 shutdown waits for the background jobs to finish.
+PLUTO_HOST_RATES = {  # Host: (Requests per second, Burst size).
+	"api.pluto.tv": (2.0, 5),
+	"images.pluto.tv": (10.0, 20)
+}
+PLUTO_HOST_RATE = (5.0, 10)  # The rate limit for any other host.
+PLUTO_BREAKER_FAILURES = 5  # Throttled or failed requests within the window that stop all requests to a host.
+PLUTO_BREAKER_WINDOW = 60.0  # Seconds over which failed requests are counted.
+PLUTO_BREAKER_COOLDOWN = 300.0  # Seconds requests to a host are stopped when the server does not give a Retry-After.
+PLUTO_BREAKER_LIMIT = 6 * 3600  # Maximum seconds a Retry-After is honoured.
+PLUTO_STAGE_BUDGETS = {  # Maximum seconds an update stage may take for a region before it is abandoned.
+	"lineup": 60,
+	"picons": 300,
+	"guide": 240  # This is for each guide window.
+}
+
+PLUTO_PICON_MANIFEST = "picons.manifest"  # This file is kept in PLUTO_FOLDER.
+PLUTO_PICON_REVALIDATE = 6 * 3600  # Minimum seconds between checks of a picon for upstream changes.
+PLUTO_JOURNAL = "update.journal"  # This file is kept in PLUTO_FOLDER.
+PLUTO_JOURNAL_LIFETIME = 3600  # Maximum age in seconds of an interrupted update that can be resumed.
+PLUTO_GUIDE_HORIZON = "guide.horizon"  # This file is kept in PLUTO_FOLDER.
+PLUTO_GUIDE_CHUNK = 12 * 3600  # Seconds of EPG fetched by each guide request.
+PLUTO_GUIDE_NOW_NEXT = 4 * 3600  # Seconds of EPG, from the start of the hour, fetched first to provide now/next data.
+PLUTO_GUIDE_FINGERPRINTS = "guide.fingerprints"  # This file is kept in PLUTO_FOLDER.
+PLUTO_EPG_BATCH = 25  # Maximum number of events handed to the EPG cache at once.
+PLUTO_EPG_ZAP_PAUSE = 5.0  # Seconds the EPG import is paused after a service change.
+PLUTO_EPG_RECORD_PAUSE = 15.0  # Seconds the EPG import is paused after a recording starts.
+PLUTO_CHANNEL_CACHE = "channels.cache"  # This file is kept in PLUTO_FOLDER.
+PLUTO_SCHEDULE = "update.schedule"  # This file is kept in PLUTO_FOLDER.
+PLUTO_SCHEDULE_WEIGHT = 0.3  # Weight of the latest update in the lineup change rate of a region.
+PLUTO_SCHEDULE_MARGIN = 6 * 3600  # Seconds before the end of the imported EPG that a region should be updated.
+PLUTO_SCHEDULE_JITTER = 0.1  # Fraction by which the update interval of a region is randomly varied.
+PLUTO_SCHEDULE_WINDOW = 900  # Seconds within which regions that are nearly due are updated together.
+PLUTO_BOOT_SETTLE = 300  # Seconds after enigma2 starts before a background update may run.
+PLUTO_BUSY_POSTPONE = 600  # Seconds a background update is postponed while a recording or timeshift is active.
+PLUTO_IDLE_TIME = 300  # Seconds without a key press after which the user is considered to be idle.
+PLUTO_IDLE_WAIT = 3600  # Maximum seconds a due update waits for the user to be idle or the receiver to be in standby.
+PLUTO_RETRY_DELAYS = (300, 900, 1800, 3600)  # Seconds before retrying updates that had to fall back to the last good data.
+PLUTO_UPDATE_TIMING = "update.timing"  # This file is kept in PLUTO_FOLDER.
+PLUTO_BROWSE_TIMING = "browse.timing"  # This file is kept in PLUTO_FOLDER.
+PLUTO_TIMING_SUMMARY = 3  # Number of the slowest spans shown when an update finishes.
+PLUTO_PICON_STORE = ".plutotv"  # This directory of shared picon images is kept in the picon directory.
 
 PLUTO_COUNTRY_NAME = 0
 PLUTO_IP = 1
@@ -125,6 +190,7 @@ PLUTO_TIDS = 2
 PLUTO_DATA = {
 	"AUTO": (_("* Automatic *"), "", "0")
 }
+regionsLoaded = False  # The region data and the settings that depend on it are loaded on first use by loadRegions().
 PLUTO_SERVICE_CHOICES = [
 	("4097", f"{_("Original")} (4097)"),
 	("5001", "ServiceGstPlayer (5001)"),
@@ -140,6 +206,32 @@ config.plugins.PlutoTV.updateTimer = ConfigSelection(default=5, choices=[
 ] + [
 	(x, ngettext("%d Hour", "%d Hours", x) % x) for x in range(1, 25)
 ])
+config.plugins.PlutoTV.adaptiveTimer = ConfigSelection(default=0, choices=[
+	(0, _("Disabled"))
+] + [
+	(x, ngettext("%d Hour", "%d Hours", x) % x) for x in (6, 12, 24, 48)
+])
+config.plugins.PlutoTV.epgHours = ConfigSelection(default=24, choices=[
+	(x, ngettext("%d Hour", "%d Hours", x) % x) for x in (24, 48, 72)
+])
+config.plugins.PlutoTV.epgSlice = ConfigSelection(default=50, choices=[
+	(0, _("Unlimited"))
+] + [
+	(x, _("%d ms") % x) for x in (25, 50, 100, 200)
+])
+config.plugins.PlutoTV.singleFetch = ConfigYesNo(default=True)
+config.plugins.PlutoTV.guideProcess = ConfigYesNo(default=False)
+config.plugins.PlutoTV.downloadLimit = ConfigSelection(default=0, choices=[
+	(0, _("Unlimited"))
+] + [
+	(x, _("%d KB/s") % x) for x in (128, 256, 512, 1024, 2048)
+])
+config.plugins.PlutoTV.playbackLimit = ConfigSelection(default=128, choices=[
+	(0, _("Unlimited"))
+] + [
+	(x, _("%d KB/s") % x) for x in (32, 64, 128, 256, 512)
+])
+config.plugins.PlutoTV.timingReport = ConfigYesNo(default=False)
 config.plugins.PlutoTV.silentMode = ConfigYesNo(default=True)
 config.plugins.PlutoTV.addXiaomi = ConfigYesNo(default=False)
 config.plugins.PlutoTV.addSamsung = ConfigYesNo(default=True)
@@ -152,30 +244,7 @@ config.plugins.PlutoTV.liveMode = ConfigSelection(default="samsung", choices=[
 	("roku", "Roku TV"),
 	("samsung", "Samsung TV")
 ])
-domData = fileReadXML(resolveFilename(SCOPE_PLUGIN_ABSOLUTE, "plutotv.xml"), default=None, source=MODULE_NAME)
-choices = []
-if domData is not None:
-	for region in domData.findall("region"):
-		country = region.get("country")
-		name = international.getCountryTranslated(country) if international else region.get("country")
-		ip = region.get("ip")
-		tids = region.get("tids")
-		if country and name and ip and tids:
-			PLUTO_DATA[country] = (name, ip, tids)
-			choices.append((country, name))
-	choices.sort(key=lambda x: x[1])
-	print(f"[PlutoTV] Data for {len(PLUTO_DATA)} regions loaded.")
-else:
-	print("[PlutoTV] Error: No region data loaded!")
-choices.insert(0, ("AUTO", _("* Automatic *")))
-config.plugins.PlutoTV.region = ConfigSelection(default="AUTO", choices=choices)
-config.plugins.PlutoTV.bouquetCount = ConfigNumber(default=0)
-config.plugins.PlutoTV.bouquetRegion = ConfigSubList()
-config.plugins.PlutoTV.bouquetService = ConfigSubList()
-for count in range(config.plugins.PlutoTV.bouquetCount.value):
-	config.plugins.PlutoTV.bouquetRegion.append(ConfigSelection(default="AUTO", choices=choices))
-	config.plugins.PlutoTV.bouquetService.append(ConfigSelection(default="4097", choices=PLUTO_SERVICE_CHOICES))
-choices = [("NONE", _("None"))] + choices
+config.plugins.PlutoTV.bouquetCount = ConfigNumber(default=0)  # The region, bouquetRegion and bouquetService settings are created by loadRegions().
 config.plugins.PlutoTV.piconMode = ConfigSelection(default="srp", choices=[
 	("srp", _("Reference")),
 	("name", _("Name")),
@@ -183,9 +252,6 @@ config.plugins.PlutoTV.piconMode = ConfigSelection(default="srp", choices=[
 ])
 # config.plugins.PlutoTV.piconPath = ConfigDirectory(default="/usr/share/enigma2/picon")
 config.plugins.PlutoTV.piconPath = ConfigSelection(default="/usr/share/enigma2/picon", choices=["/usr/share/enigma2/picon", "/picon"])
-piconPath = config.plugins.PlutoTV.piconPath.value
-if not isdir(piconPath):
-	makedirs(piconPath)
 config.plugins.PlutoTV.addDescriptions = ConfigYesNo(default=True)
 config.plugins.PlutoTV.forcePiconDownload = ConfigYesNo(default=False)
 config.plugins.PlutoTV.separateEpisode = ConfigYesNo(default=False)
@@ -339,6 +405,7 @@ class PlutoTV(Screen):
 		def keyRedHelp():
 			return _("Go back to the previous menu") if self.history else _("Close Pluto TV")
 
+		loadRegions()
 		Screen.__init__(self, session, enableHelp=True)
 		self.baseTitle = _("Pluto TV")
 		self.setTitle(self.baseTitle)
@@ -412,13 +479,19 @@ class PlutoTV(Screen):
 		self.posterTimer.callback.append(self.getTimedPoster)
 		self.postersToDownload = []
 		self.picLoad = ePicLoad()
+		self.timings = PlutoTimings(config.plugins.PlutoTV.timingReport.value)
 		self.episodes = {}
 		self.favorites = {}
 		self.favoritesModified = False
 		self.inFavoritesMenu = False
+		self.categoriesRequest = None  # The Deferred of the categories fetch that is still running.
+		self.seasonsRequest = None  # The Deferred of the seasons fetch that is still running.
 		self.seasonText = ngettext("Season", "Seasons", 1)  # This is required to resolve an ambiguity is translations for "Season" and "Seasons"!
 		self.onLayoutFinish.append(self.layoutFinished)
+		self.onClose.append(self.cancelCategories)
+		self.onClose.append(self.cancelSeasons)
 		self.onClose.append(self.saveFavorites)
+		self.onClose.append(self.saveTimings)
 
 	def layoutFinished(self):
 		self["menu"].enableAutoNavigation(False)  # Override list box self navigation.
@@ -451,25 +524,35 @@ class PlutoTV(Screen):
 		elif len(self.favorites):
 			print("[PlutoTV] No favorites changed, nothing to save.")
 
+	def saveTimings(self):
+		self.timings.save(PLUTO_BROWSE_TIMING, "Pluto TV browsing")
+
 	def getCategories(self):
 		self.setTitle(self.baseTitle)
 		self["key_red"].setText(_("Close"))
 		self["previousMenuAction"].setEnabled(False)
+		self["menuActions"].setEnabled(False)  # Wait for the categories to arrive before allowing navigation.
 		self.history.clear()
+		self.cancelSeasons()
+		self.cancelCategories()
+		header = buildHeader(PLUTO_DATA[self.region][PLUTO_IP])
+		param = {
+			"includeItems": "true",
+			"deviceType": "web",
+			"deviceId": deviceIdentifier(),
+			"sid": sessionIdentifier(),
+		}
+		self.categoriesRequest = plutoWorkers.deferToWorker("interactive", self.timings.wrap("categories fetch", fetchURL), PLUTO_VOD_URL, header=header, param=param)
+		self.categoriesRequest.addCallback(self.showCategories).addErrback(self.showCategoriesError)
+
+	def showCategories(self, carousel):  # The carousel is a single dictionary.
+		self.categoriesRequest = None
 		self.categories.clear()
 		self.categoryMenu.clear()
 		if self.region not in self.favorites:
 			self.favorites[self.region] = {}
 		self.categories[self.FAVORITES_NAME] = [self.favorites[self.region][x] for x in self.favorites[self.region].keys()]  # It is assumed that the favorites category item is *always* first!
 		self.categoryMenu.append((self.FAVORITES_NAME, self.FAVORITES_NAME, len(self.favorites[self.region])))  # It is assumed that the favorites menu item is *always* first!
-		header = buildHeader(PLUTO_DATA[self.region][PLUTO_IP])
-		param = {
-			"includeItems": "true",
-			"deviceType": "web",
-			"deviceId": DEVICEID1_HEX,
-			"sid": SID1_HEX,
-		}
-		carousel = fetchURL(PLUTO_VOD_URL, header=header, param=param)  # A single dictionary.
 		# carouselDump(self.region, carousel)
 		# offset = carousel.get("offset", 0)
 		# page = carousel.get("page", 0)
@@ -479,6 +562,7 @@ class PlutoTV(Screen):
 		totalCategories = int(carousel.get("totalCategories", "0"))
 		if totalCategories:
 			print(f"[PlutoTV] {totalCategories} {PLUTO_DATA[self.region][PLUTO_COUNTRY_NAME]} VOD categories found.")
+			begin = perf_counter()
 			for category in carousel.get("categories", []):  # List of category dictionaries.
 				# identifier = category.get("_id", "")
 				# name = category.get("name", "")
@@ -560,6 +644,7 @@ class PlutoTV(Screen):
 						item.get("clip", {}),  # CATEGORY_CLIP.
 						item.get("cc", False)  # CATEGORY_CAPTIONS.
 					))
+			self.timings.record("categories parse", self.region, perf_counter() - begin)
 			self.setTitle(f"{self.baseTitle} - {"" if self.region == "AUTO" else f"{PLUTO_DATA[self.region][PLUTO_COUNTRY_NAME]} "}{_("VOD Categories Menu")}")
 			self["menu"].setList([self.buildMenuEntry(x[0], x[1], "menu", x[2]) for x in self.categoryMenu])
 			self["loading"].hide()
@@ -569,6 +654,18 @@ class PlutoTV(Screen):
 			self["loading"].setText(f"{_("Error: No VOD categories available!")}\n\n\n\n{_("Pluto TV may not be available in your location.")}")
 			self["menuActions"].setEnabled(False)
 
+	def showCategoriesError(self, error):
+		if error.check(defer.CancelledError):  # The region was changed or the screen closed before the categories arrived.
+			return
+		print(f"[PlutoTV] Error: Unable to get categories!  ({error.getErrorMessage()})")
+		self.showCategories({})
+
+	def cancelCategories(self):  # The result of the categories fetch is dropped, the fetch itself is left to finish in its worker.
+		if self.categoriesRequest:
+			categoriesRequest = self.categoriesRequest
+			self.categoriesRequest = None
+			categoriesRequest.cancel()
+
 	def buildMenuEntry(self, identifier, name, menuType, count="", episode=0):
 		def showProgress(media):
 			icon = f"pluto_{media}_unwatched.png"
@@ -608,8 +705,9 @@ class PlutoTV(Screen):
 
 	def getTimedPoster(self):
 		def getPoster(path, url):
-			def getPosterDone(path):
+			def getPosterDone(path, begin=None):
 				def showPoster(picInfo=None):
+					self.timings.record("poster decode", "", perf_counter() - decodeBegin)
 					try:
 						image = self.picLoad.getData()
 						if image:
@@ -618,6 +716,9 @@ class PlutoTV(Screen):
 					except Exception as err:
 						print(f"[PlutoTV] showPoster Error: '{err}'!")
 
+				if begin is not None:
+					self.timings.record("poster fetch", "", perf_counter() - begin)
+				decodeBegin = perf_counter()
 				try:
 					pictureData = self.picLoad.PictureData.get()
 					del pictureData[:]
@@ -639,7 +740,7 @@ class PlutoTV(Screen):
 				getPosterDone(path)  # Use poster already cached.
 			else:
 				# print(f"[PlutoTV] getPoster DEBUG: Fetch poster '{path}' from '{url}'.")
-				PlutoDownloader().start(path, url).addCallback(getPosterDone).addErrback(getPosterError, path, url)  # Fetch poster.
+				PlutoDownloader().start(path, url).addCallback(getPosterDone, perf_counter()).addErrback(getPosterError, path, url)  # Fetch poster.
 
 		path, url = self.postersToDownload[-1]
 		self.postersToDownload.clear()
@@ -812,8 +913,8 @@ class PlutoTV(Screen):
 	def keySelect(self):
 		def playVOD(url, name, identifier):
 			url = updateQuery(url, {
-				"deviceId": DEVICEID1_HEX,
-				"sid": DEVICEID1_HEX,
+				"deviceId": deviceIdentifier(),
+				"sid": deviceIdentifier(),
 				"deviceType": "web",
 				"deviceMake": "Firefox",
 				"deviceModel": "Firefox",
@@ -863,91 +964,109 @@ class PlutoTV(Screen):
 				param = {
 					"includeItems": "true",
 					"deviceType": "web",
-					"deviceId": DEVICEID1_HEX,
-					"sid": SID1_HEX,
+					"deviceId": deviceIdentifier(),
+					"sid": sessionIdentifier(),
 				}
-				series = fetchURL(PLUTO_SEASON_URL % identifier, header=header, param=param)
-				# seriesDump(self.region, series)
-				# identifier = series.get("_id", "")
-				# name = series.get("name", "")
-				# summary = series.get("summary", "")
-				# description = series.get("description", "")
-				# slug = series.get("slug", "")
-				# type = series.get("type", "")
-				# rating = series.get("rating", "")
-				# featuredImage = series.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
-				# genre = series.get("genre", "")
-				# offset = series.get("offset", 0)
-				# page = series.get("page", 0)
-				# seasons = series.get("seasons", [])  # List of dictionaries of the items in this season.
-				# covers = series.get("covers", [])  # Typically a list of dictionaries with keys "aspectRatio" and "url".
-				# poster16_9 = series.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
-				# avail = series.get("avail", {})  # Typically an empty dictionary.
-				self.episodes.clear()
-				for season in series.get("seasons", []):
-					# episodes = season.get("episodes", [])  # List of dictionaries of the episodes in this season.
-					# number = season.get("number", 0)
-					for episode in (season.get("episodes", [])):
-						# identifier = episode.get("_id", "")
-						# name = episode.get("name", "")
-						# description = episode.get("description", "")
-						# allotment = episode.get("allotment", 0)
-						# rating = episode.get("rating", "")
-						# slug = episode.get("slug", "")
-						# duration = episode.get("duration", 0)
-						# originalContentDuration = episode.get("originalContentDuration", 0)
-						# genre = episode.get("genre", "")
-						# type = episode.get("type", "")
-						# number = episode.get("number", 0)
-						# season = episode.get("season", 0)
-						# stitched = episode.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
-						# covers = episode.get("covers", [])  # Typically a list of dictionaries with keys "aspectRatio" and "url".
-						# poster16_9 = episode.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
-						# clip = episode.get("clip", {})  # Typically keys "actors"[], "writers"[], "directors"[], producers"[] and "originalReleaseDate".
-						# cc = episode.get("cc", False)
-						season = int(episode.get("season", "0") or "0")
-						if season:
-							if season not in self.episodes:
-								self.episodes[season] = []
-							urls = episode.get("stitched", {}).get("urls", [])
-							if len(urls) > 0:
-								url = urls[0].get("url", "")
-							else:
-								continue
-							covers = episode.get("covers", [])
-							coversLength = len(covers)
-							poster = ""
-							image = ""
-							if coversLength > 2:
-								image = covers[2].get("url", "")
-							if coversLength > 1 and len(image) == 0:
-								image = covers[1].get("url", "")
-							if coversLength > 0:
-								poster = covers[0].get("url", "")
-							self.episodes[season].append((
-								episode.get("_id", ""),  # EPISODE_IDENTIFIER.
-								episode.get("name", ""),  # EPISODE_NAME.
-								episode.get("number", "0"),  # EPISODE_NUMBER.
-								episode.get("season", "0"),  # EPISODE_SEASON.
-								episode.get("description", ""),  # EPISODE_DESCRIPTION.
-								episode.get("rating", ""),  # EPISODE_RATING.
-								int(episode.get("duration", "0") or "0") // 1000,  # EPISODE_DURATION.
-								int(episode.get("originalContentDuration", "0") or "0") // 1000,  # EPISODE_ORIGINAL_DURATION.
-								episode.get("genre", ""),  # EPISODE_GENRE.
-								poster,  # EPISODE_POSTER.
-								image,  # EPISODE_IMAGE.
-								url,  # EPISODE_URL.
-								episode.get("clip", {})  # EPISODE_CLIP.
-							))
-				if self.episodes:
-					menu = [self.buildMenuEntry(x, f"{self.seasonText} {x}", "seasons", len(self.episodes[x]) or "") for x in self.episodes.keys()]
-					count = len(menu)
-				else:
-					menu = [self.buildMenuEntry(0, _("** No seasons available **"), "empty")]
-					count = 0
-				self["menu"].setList(menu)
-				self["menu"].setCurrentIndex(0)
-				self.setTitle(f"{self.baseTitle} - {series.get("name", "")} - {ngettext("Season", "Seasons", count)}")
+				self["menuActions"].setEnabled(False)  # Wait for the seasons to arrive before allowing further navigation.
+				self.seasonsRequest = plutoWorkers.deferToWorker("interactive", self.timings.wrap("series fetch", fetchURL), PLUTO_SEASON_URL % identifier, header=header, param=param)
+				self.seasonsRequest.addCallback(self.timings.wrap("series parse", self.showSeasons)).addErrback(self.showSeasonsError)
+
+	def showSeasons(self, series):
+		# seriesDump(self.region, series)
+		# identifier = series.get("_id", "")
+		# name = series.get("name", "")
+		# summary = series.get("summary", "")
+		# description = series.get("description", "")
+		# slug = series.get("slug", "")
+		# type = series.get("type", "")
+		# rating = series.get("rating", "")
+		# featuredImage = series.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
+		# genre = series.get("genre", "")
+		# offset = series.get("offset", 0)
+		# page = series.get("page", 0)
+		# seasons = series.get("seasons", [])  # List of dictionaries of the items in this season.
+		# covers = series.get("covers", [])  # Typically a list of dictionaries with keys "aspectRatio" and "url".
+		# poster16_9 = series.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
+		# avail = series.get("avail", {})  # Typically an empty dictionary.
+		self.seasonsRequest = None
+		self.episodes.clear()
+		for season in series.get("seasons", []):
+			# episodes = season.get("episodes", [])  # List of dictionaries of the episodes in this season.
+			# number = season.get("number", 0)
+			for episode in (season.get("episodes", [])):
+				# identifier = episode.get("_id", "")
+				# name = episode.get("name", "")
+				# description = episode.get("description", "")
+				# allotment = episode.get("allotment", 0)
+				# rating = episode.get("rating", "")
+				# slug = episode.get("slug", "")
+				# duration = episode.get("duration", 0)
+				# originalContentDuration = episode.get("originalContentDuration", 0)
+				# genre = episode.get("genre", "")
+				# type = episode.get("type", "")
+				# number = episode.get("number", 0)
+				# season = episode.get("season", 0)
+				# stitched = episode.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
+				# covers = episode.get("covers", [])  # Typically a list of dictionaries with keys "aspectRatio" and "url".
+				# poster16_9 = episode.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
+				# clip = episode.get("clip", {})  # Typically keys "actors"[], "writers"[], "directors"[], producers"[] and "originalReleaseDate".
+				# cc = episode.get("cc", False)
+				season = int(episode.get("season", "0") or "0")
+				if season:
+					if season not in self.episodes:
+						self.episodes[season] = []
+					urls = episode.get("stitched", {}).get("urls", [])
+					if len(urls) > 0:
+						url = urls[0].get("url", "")
+					else:
+						continue
+					covers = episode.get("covers", [])
+					coversLength = len(covers)
+					poster = ""
+					image = ""
+					if coversLength > 2:
+						image = covers[2].get("url", "")
+					if coversLength > 1 and len(image) == 0:
+						image = covers[1].get("url", "")
+					if coversLength > 0:
+						poster = covers[0].get("url", "")
+					self.episodes[season].append((
+						episode.get("_id", ""),  # EPISODE_IDENTIFIER.
+						episode.get("name", ""),  # EPISODE_NAME.
+						episode.get("number", "0"),  # EPISODE_NUMBER.
+						episode.get("season", "0"),  # EPISODE_SEASON.
+						episode.get("description", ""),  # EPISODE_DESCRIPTION.
+						episode.get("rating", ""),  # EPISODE_RATING.
+						int(episode.get("duration", "0") or "0") // 1000,  # EPISODE_DURATION.
+						int(episode.get("originalContentDuration", "0") or "0") // 1000,  # EPISODE_ORIGINAL_DURATION.
+						episode.get("genre", ""),  # EPISODE_GENRE.
+						poster,  # EPISODE_POSTER.
+						image,  # EPISODE_IMAGE.
+						url,  # EPISODE_URL.
+						episode.get("clip", {})  # EPISODE_CLIP.
+					))
+		if self.episodes:
+			menu = [self.buildMenuEntry(x, f"{self.seasonText} {x}", "seasons", len(self.episodes[x]) or "") for x in self.episodes.keys()]
+			count = len(menu)
+		else:
+			menu = [self.buildMenuEntry(0, _("** No seasons available **"), "empty")]
+			count = 0
+		self["menu"].setList(menu)
+		self["menu"].setCurrentIndex(0)
+		self.setTitle(f"{self.baseTitle} - {series.get("name", "")} - {ngettext("Season", "Seasons", count)}")
+		self["menuActions"].setEnabled(True)
+
+	def showSeasonsError(self, error):
+		if error.check(defer.CancelledError):  # The user went back or closed the screen before the seasons arrived.
+			return
+		print(f"[PlutoTV] Error: Unable to get seasons!  ({error.getErrorMessage()})")
+		self.showSeasons({})
+
+	def cancelSeasons(self):  # The result of the seasons fetch is dropped, the fetch itself is left to finish in its worker.
+		if self.seasonsRequest:
+			seasonsRequest = self.seasonsRequest
+			self.seasonsRequest = None
+			seasonsRequest.cancel()
 
 	def keyMovieDatabase(self):
 		menuData = self.getMenuSelection()
@@ -998,6 +1117,8 @@ class PlutoTV(Screen):
 		if not self.history:
 			self.keyClose()
 		else:
+			self.cancelSeasons()
+			self["menuActions"].setEnabled(True)
 			if top:
 				history = self.history[0]
 				self.history.clear()
@@ -1046,16 +1167,194 @@ class PlutoTV(Screen):
 		return (self["menu"].getCurrentIndex(),) + self["menu"].getCurrent()
 
 
+class PlutoWorkers:
+	def __init__(self):
+		self.pools = {}
+		self.activity = {}  # Priority: Number of queued and running jobs.
+		self.condition = Condition()
+
+	def getPool(self, name):
+		with self.condition:
+			pool = self.pools.get(name)
+			if pool is None:
+				pool = ThreadPool(minthreads=0, maxthreads=PLUTO_WORKERS[name][PLUTO_WORKER_SIZE], name=f"PlutoTV-{name}")
+				pool.start()
+				self.pools[name] = pool
+			return pool
+
+	def queueJob(self, name):
+		priority = PLUTO_WORKERS[name][PLUTO_WORKER_PRIORITY]
+		with self.condition:
+			self.activity[priority] = self.activity.get(priority, 0) + 1
+
+	def runJob(self, name, function, *args, **kwargs):
+		try:
+			return function(*args, **kwargs)
+		finally:
+			priority = PLUTO_WORKERS[name][PLUTO_WORKER_PRIORITY]
+			with self.condition:
+				self.activity[priority] -= 1
+				self.condition.notify_all()
+
+	def deferToWorker(self, name, function, *args, **kwargs):  # This must be called from the reactor thread.
+		self.queueJob(name)
+		return threads.deferToThreadPool(reactor, self.getPool(name), self.runJob, name, function, *args, **kwargs)
+
+	def callInWorker(self, name, function, *args, **kwargs):
+		self.queueJob(name)
+		self.getPool(name).callInThread(self.runJob, name, function, *args, **kwargs)
+
+	def runBatch(self, name, function, argumentsList, deadline=None):  # This blocks so must never be called from the reactor thread.
+		def batchResult(index, success, result):
+			if not success:
+				print(f"[PlutoTV] Error: Worker '{name}' job failed!  ({result.getErrorMessage()})")
+				result = None
+			with done:
+				results[index] = result
+				pending[0] -= 1
+				done.notify()
+
+		pool = self.getPool(name)
+		results = [None] * len(argumentsList)
+		pending = [len(argumentsList)]
+		done = Condition()
+		for index, arguments in enumerate(argumentsList):
+			self.queueJob(name)
+			pool.callInThreadWithCallback(partial(batchResult, index), self.runJob, name, function, *arguments)
+		with done:
+			while pending[0]:
+				done.wait(PLUTO_ABORT_POLL)
+				if pending[0] and deadline and deadline.expired():  # Jobs still queued are expected to check the deadline themselves.
+					print(f"[PlutoTV] Worker '{name}' batch abandoned with {pending[0]} job(s) outstanding.")
+					break
+		return results
+
+	def runCancellable(self, name, deadline, function, /, *args, **kwargs):  # Wait for a blocking call in a worker, giving up as soon as the deadline expires.
+		def jobResult(success, result):
+			if success:
+				results.append(result)
+			else:
+				print(f"[PlutoTV] Error: Worker '{name}' job failed!  ({result.getErrorMessage()})")
+			done.set()
+
+		results = []
+		done = Event()
+		self.queueJob(name)
+		self.getPool(name).callInThreadWithCallback(jobResult, self.runJob, name, function, *args, **kwargs)
+		while not done.wait(PLUTO_ABORT_POLL):
+			if deadline.expired():
+				print(f"[PlutoTV] Worker '{name}' job abandoned as the update was aborted or ran out of time.")
+				return None
+		return results[0] if results else None
+
+	def changePriority(self, name, newName):  # Move the calling job to the priority of another worker.
+		with self.condition:
+			priority = PLUTO_WORKERS[name][PLUTO_WORKER_PRIORITY]
+			self.activity[priority] = self.activity.get(priority, 0) - 1
+			priority = PLUTO_WORKERS[newName][PLUTO_WORKER_PRIORITY]
+			self.activity[priority] = self.activity.get(priority, 0) + 1
+			self.condition.notify_all()
+
+	def yieldToForeground(self, name, timeout=PLUTO_WORKER_YIELD):  # Wait, for a limited time, while higher priority work is queued or running.
+		priority = PLUTO_WORKERS[name][PLUTO_WORKER_PRIORITY]
+		deadline = time() + timeout
+		with self.condition:
+			while any(count > 0 for level, count in self.activity.items() if level < priority):
+				remaining = deadline - time()
+				if remaining <= 0:
+					break
+				self.condition.wait(remaining)
+
+	def stop(self, timeout=None):  # Stop all pools, waiting no more than timeout seconds for the jobs to finish.
+		with self.condition:
+			pools = list(self.pools.values())
+			self.pools.clear()
+		stopper = Thread(target=lambda: [x.stop() for x in pools], name="PlutoTV-stop", daemon=True)  # Finishing jobs need the condition so the pools must be stopped without it.
+		stopper.start()
+		stopper.join(timeout)
+		if stopper.is_alive():
+			print(f"[PlutoTV] Warning: Background jobs were still running after {timeout} seconds!")
+
+
+class PlutoDeadline:  # The time budget of an update stage, it also expires as soon as the update is aborted.
+	def __init__(self, budget, aborted=None):
+		self.expires = monotonic() + budget
+		self.aborted = aborted
+
+	def expired(self):
+		return monotonic() >= self.expires or bool(self.aborted and self.aborted())
+
+	def timeout(self):  # Return the (connect, read) timeout for a request, never beyond the end of the budget.
+		remaining = max(self.expires - monotonic(), 0.1)
+		return (min(PLUTO_CONNECT_TIMEOUT, remaining), min(PLUTO_READ_TIMEOUT, remaining))
+
+
+class PlutoThrottled(Exception):  # Requests to a host are paused because the host is throttling or failing.
+	def __init__(self, host, delay):
+		Exception.__init__(self, f"Requests to '{host}' are paused for {delay:.0f} seconds")
+		self.delay = delay
+
+
+class PlutoRateLimiter:  # Limit the request rate to each host and stop using a host while it is throttling or failing.
+	def __init__(self):
+		self.lock = Lock()
+		self.buckets = {}  # Host: (Tokens, Monotonic time of the last refill).
+		self.failures = {}  # Host: [Monotonic times of recent failures].
+		self.openUntil = {}  # Host: Monotonic time until which no requests are made.
+
+	def acquire(self, host):  # Wait for a request token, raise PlutoThrottled while requests to the host are stopped or instead of waiting in the reactor thread.
+		rate, burst = PLUTO_HOST_RATES.get(host, PLUTO_HOST_RATE)
+		while True:
+			with self.lock:
+				now = monotonic()
+				openUntil = self.openUntil.get(host, 0.0)
+				if now < openUntil:
+					raise PlutoThrottled(host, openUntil - now)
+				tokens, last = self.buckets.get(host, (burst, now))
+				tokens = min(burst, tokens + (now - last) * rate)
+				if tokens >= 1:
+					self.buckets[host] = (tokens - 1, now)
+					return
+				self.buckets[host] = (tokens, now)
+				wait = (1 - tokens) / rate
+			if current_thread() is main_thread():  # The reactor thread must never sleep, it would freeze the user interface.
+				raise PlutoThrottled(host, wait)
+			sleep(wait)
+
+	def record(self, host, response):  # Return the Retry-After delay if the host has stopped accepting requests.
+		status = response.status_code
+		with self.lock:
+			if status != 429 and status < 500:
+				self.failures.pop(host, None)
+				return None
+			now = monotonic()
+			failures = [x for x in self.failures.get(host, []) if now - x < PLUTO_BREAKER_WINDOW]
+			failures.append(now)
+			self.failures[host] = failures
+			delay = retryAfter(response.headers.get("Retry-After"))
+			if delay is None and len(failures) >= PLUTO_BREAKER_FAILURES:
+				delay = PLUTO_BREAKER_COOLDOWN
+			if delay is not None:
+				self.openUntil[host] = max(self.openUntil.get(host, 0.0), now + delay)
+				self.failures.pop(host, None)
+				print(f"[PlutoTV] Requests to '{host}' are paused for {delay:.0f} seconds after HTTP {status} responses.")
+			return delay
+
+	def retryDelay(self, url):  # Return the seconds until requests to the host of the URL resume, 0 if they are not paused.
+		with self.lock:
+			return max(self.openUntil.get(urlparse(url).hostname, 0.0) - monotonic(), 0.0)
+
+
 class PlutoDownloader:
 	def start(self, filename, sourcefile, overwrite=False):
-		def downloadWithRequests(url, filename, timeout=30):
+		def downloadWithRequests(url, filename):
 			def download():
 				try:
 					if "missing.png" in url or "MISSING" in url:
 						# print("[PlutoTV] Don't bother fetching the 'missing.png' or 'MISSING' picons!")
 						pass
 					else:
-						response = get(url, timeout=timeout)
+						response = limitedGet(url, timeout=PLUTO_TIMEOUT)
 						response.raise_for_status()
 						with open(filename, 'wb') as fd:
 							fd.write(response.content)
@@ -1064,16 +1363,16 @@ class PlutoDownloader:
 					print(f"[PlutoTV] download DEBUG: Error in download!  ({err})")
 
 			try:
-				return threads.deferToThread(download)
+				return plutoWorkers.deferToWorker("interactive", download)
 			except Exception as err:
-				print(f"[PlutoTV] downloadWithRequests DEBUG: Error in deferToThread!  ({err})")
+				print(f"[PlutoTV] downloadWithRequests DEBUG: Error in deferToWorker!  ({err})")
 
 		try:
 			if not filename or not sourcefile:
 				return defer.fail(Exception("[PlutoTV] PlutoDownloader Error: Wrong arguments!"))
 			if not overwrite and exists(filename) and getsize(filename):
 				return defer.succeed(filename)
-			return downloadWithRequests(sourcefile, filename, timeout=30).addCallback(self.downloadDone, filename).addErrback(self.downloadFail, sourcefile)
+			return downloadWithRequests(sourcefile, filename).addCallback(self.downloadDone, filename).addErrback(self.downloadFail, sourcefile)
 		except Exception as err:
 			print(f"[PlutoTV] start DEBUG: Error in download!  ({err})")
 
@@ -1094,6 +1393,7 @@ class PlutoDownloader:
 
 class PlutoSetup(Setup):
 	def __init__(self, session):
+		loadRegions()
 		self.choices = list(PLUTO_DATA.keys())
 		self.baseConfigLength = None
 		Setup.__init__(self, session=session, setup="PlutoTV", plugin="Extensions/PlutoTV", PluginLanguageDomain="PlutoTV")
@@ -1292,6 +1592,242 @@ class PlutoPlayer(MoviePlayer):
 		self.leavePlayer()
 
 
+class PlutoEPGCommitter:  # Hand events to the EPG cache in short time slices so that live TV and the GUI stay responsive.
+	def __init__(self):
+		self.session = None
+		self.quietUntil = 0.0  # Imports are paused until this monotonic time.
+		self.sliceTime = 0.0
+		self.commitTime = 0.0
+		self.pauseTime = 0.0
+		self.slices = 0
+
+	def attach(self, session):
+		self.session = session
+		session.nav.event.append(self.serviceEvent)
+		session.nav.record_event.append(self.recordEvent)
+
+	def detach(self):
+		if self.session:
+			if self.serviceEvent in self.session.nav.event:
+				self.session.nav.event.remove(self.serviceEvent)
+			if self.recordEvent in self.session.nav.record_event:
+				self.session.nav.record_event.remove(self.recordEvent)
+			self.session = None
+
+	def serviceEvent(self, event):  # This runs in the reactor thread.
+		if event == iPlayableService.evStart:
+			self.quietUntil = max(self.quietUntil, monotonic() + PLUTO_EPG_ZAP_PAUSE)
+
+	def recordEvent(self, service, event):  # This runs in the reactor thread.
+		if event in (iRecordableService.evStart, iRecordableService.evRecordRunning):
+			self.quietUntil = max(self.quietUntil, monotonic() + PLUTO_EPG_RECORD_PAUSE)
+
+	def reset(self):
+		self.sliceTime = 0.0
+		self.commitTime = 0.0
+		self.pauseTime = 0.0
+		self.slices = 1
+
+	def commit(self, serviceReference, events):  # This runs in the update worker thread.
+		epgCache = eEPGCache.getInstance()
+		budget = config.plugins.PlutoTV.epgSlice.value / 1000.0
+		for index in range(0, len(events), PLUTO_EPG_BATCH):
+			begin = monotonic()
+			while monotonic() < self.quietUntil:  # Do not compete with zapping or a starting recording.
+				sleep(0.1)
+			if budget and self.sliceTime >= budget:  # Rest for as long as the slice took.
+				sleep(self.sliceTime)
+				self.sliceTime = 0.0
+				self.slices += 1
+			self.pauseTime += monotonic() - begin
+			begin = monotonic()
+			epgCache.importEvents(serviceReference, events[index:index + PLUTO_EPG_BATCH])
+			elapsed = monotonic() - begin
+			self.sliceTime += elapsed
+			self.commitTime += elapsed
+
+
+class PlutoBandwidth:  # Share a bytes per second budget between update downloads, tightened while a stream is playing.
+	def __init__(self):
+		self.session = None
+		self.lock = Lock()
+		self.playing = False
+		self.allowance = 0.0  # Bytes that may be downloaded now, negative when downloads must wait.
+		self.last = monotonic()
+		self.downloaded = 0
+		self.throttledBytes = 0
+		self.throttledTime = 0.0
+
+	def attach(self, session):
+		self.session = session
+		session.nav.event.append(self.serviceEvent)
+
+	def detach(self):
+		if self.session:
+			if self.serviceEvent in self.session.nav.event:
+				self.session.nav.event.remove(self.serviceEvent)
+			self.session = None
+
+	def serviceEvent(self, event):  # This runs in the reactor thread.
+		if event == iPlayableService.evStart:
+			serviceReference = self.session.nav.getCurrentlyPlayingServiceReference()
+			self.playing = serviceReference is not None and "%3a//" in serviceReference.toString().lower()  # Streams share the internet connection.
+		elif event == iPlayableService.evEnd:
+			self.playing = False
+
+	def limit(self):  # Return the current budget in bytes per second, 0 for no limit.
+		limits = [config.plugins.PlutoTV.downloadLimit.value]
+		if self.playing:
+			limits.append(config.plugins.PlutoTV.playbackLimit.value)
+		limits = [x for x in limits if x]
+		return min(limits) * 1024 if limits else 0
+
+	def reset(self):
+		with self.lock:
+			self.downloaded = 0
+			self.throttledBytes = 0
+			self.throttledTime = 0.0
+
+	def consume(self, size):  # This runs in worker threads and blocks for as long as the budget requires.
+		with self.lock:
+			now = monotonic()
+			self.downloaded += size
+			rate = self.limit()
+			if rate:
+				self.allowance = min(self.allowance + (now - self.last) * rate, rate) - size  # Allow a burst of up to one second.
+				wait = -self.allowance / rate if self.allowance < 0 else 0.0
+			else:
+				self.allowance = 0.0
+				wait = 0.0
+			self.last = now
+			if wait:
+				self.throttledBytes += size
+				self.throttledTime += wait
+		if wait:
+			sleep(wait)
+
+
+class PlutoSpan:  # Time a block of code for PlutoTimings.
+	__slots__ = ("timings", "name", "region", "begin")
+
+	def __init__(self, timings, name, region):
+		self.timings = timings
+		self.name = name
+		self.region = region
+		self.begin = 0.0
+
+	def __enter__(self):
+		self.begin = perf_counter()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.timings.record(self.name, self.region, perf_counter() - self.begin)
+		return False
+
+
+class PlutoTimings:  # Collect where an update or a browsing session spends its time, doing nothing when the report is disabled.
+	NO_SPAN = nullcontext()
+
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.started = time()
+		self.lock = Lock()
+		self.spans = {}  # (Name, Region): [Count, Total seconds, Longest seconds].
+
+	def span(self, name, region=""):  # Use as "with timings.span(name, region):".
+		return PlutoSpan(self, name, region) if self.enabled else self.NO_SPAN
+
+	def wrap(self, name, function):  # Return the function timed as a span, for calls handed to workers or Deferreds.
+		if not self.enabled:
+			return function
+
+		def timedFunction(*args, **kwargs):
+			with PlutoSpan(self, name, ""):
+				return function(*args, **kwargs)
+
+		return timedFunction
+
+	def record(self, name, region, elapsed):  # This is called from worker threads as well as the reactor thread.
+		if self.enabled:
+			with self.lock:
+				span = self.spans.get((name, region))
+				if span:
+					span[0] += 1
+					span[1] += elapsed
+					span[2] = max(span[2], elapsed)
+				else:
+					self.spans[(name, region)] = [1, elapsed, elapsed]
+
+	def save(self, fileName, title):  # Write the report to PLUTO_FOLDER and return a summary of the slowest spans.
+		if not self.enabled or not self.spans:
+			return ""
+		with self.lock:
+			spans = sorted(self.spans.items(), key=lambda x: x[1][1], reverse=True)
+		lines = [
+			f"{title} timing report, {strftime("%Y-%m-%d %H:%M:%S", localtime(self.started))}, {time() - self.started:.1f} seconds.",
+			"",
+			f"{"Span":<16} {"Region":<8} {"Count":>6} {"Total":>10} {"Average":>10} {"Longest":>10}"
+		]
+		for (name, region), (count, total, longest) in spans:
+			lines.append(f"{name:<16} {region:<8} {count:>6} {total:>9.3f}s {total * 1000 / count:>8.1f}ms {longest * 1000:>8.1f}ms")
+		lines.append("")
+		path = join(PLUTO_FOLDER, fileName)
+		if fileWriteLines(path, lines, source=MODULE_NAME):
+			print(f"[PlutoTV] Timing report saved to '{path}'.")
+		return ", ".join(f"{name}{f" {region}" if region else ""} {total:.1f}s" for (name, region), (count, total, longest) in spans[:PLUTO_TIMING_SUMMARY])
+
+
+class PlutoGuideProcess:  # Parse and transform a fetched guide window in a low priority helper process, only the events are passed back.
+	def __init__(self, updater, guidePath, identifiers, deadline):
+		self.updater = updater
+		self.guidePath = guidePath
+		self.identifiers = identifiers
+		self.deadline = deadline  # This limits the whole transform, the helper is killed when it expires.
+		self.completed = False  # This is True if the helper transformed the whole guide.
+		self.process = None
+
+	def command(self):  # Return the command to run the helper, enigma2 itself is not a Python interpreter.
+		python = executable if basename(executable).startswith("python") else which("python3") or "/usr/bin/python3"
+		command = [python, guideprocess.__file__]
+		ionice = which("ionice")
+		return [ionice, "-c", "3"] + command if ionice else command
+
+	def __iter__(self):  # Yield (Channel identifier, Name, Events) as the helper transforms each channel.
+		buffer = bytearray()
+		try:
+			self.process = Popen(self.command(), stdin=PIPE, stdout=PIPE)  # The helper inherits stderr so its messages go to the enigma2 log.
+			with self.process.stdin as fd:
+				fd.write(dumps((self.guidePath, set(self.identifiers), _("Rating"), _("Season, episode")), protocol=5))
+			reader = self.process.stdout.fileno()
+			while not self.deadline.expired():  # The deadline also expires when the update is aborted.
+				if not select([reader], [], [], PLUTO_ABORT_POLL)[0]:
+					continue
+				chunk = read(reader, 65536)
+				if not chunk:
+					self.completed = self.process.wait() == 0
+					break
+				buffer += chunk
+				while len(buffer) >= 4 and len(buffer) >= 4 + (size := int.from_bytes(buffer[:4], "little")):
+					identifier, name, events = loads(buffer[4:4 + size])
+					del buffer[:4 + size]
+					yield identifier, name or _("* Unknown *"), events
+			else:
+				if not self.updater.abort:
+					print("[PlutoTV] Error: The guide process ran out of time!")
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to run the guide process!  ({err.strerror})")
+		finally:
+			if self.process:
+				self.kill()  # The update was aborted, ran out of time or the guide was not fully read.
+				self.process.wait()
+				self.process.stdout.close()
+
+	def kill(self):  # Kill the helper if it is still running, this is also used when the update is cancelled.
+		process = self.process
+		if process and process.poll() is None:
+			process.kill()
+
+
 class PlutoUpdater:
 	EXIT_IDLE = 0
 	EXIT_DONE = 0
@@ -1299,475 +1835,1054 @@ class PlutoUpdater:
 	EXIT_ABORT = 2
 	EXIT_ERROR = 3
 
-	CHANNEL_NUMBER = 0
-	CHANNEL_IDENTIFIER = 1
-	CHANNEL_NAME = 2
-	CHANNEL_PICON_URL = 3
-	CHANNEL_SERVICE_URL = 4
+	CHANNEL_IDENTIFIER = 0
+	CHANNEL_NAME = 1
+	CHANNEL_LINES = 2
+	CHANNEL_SERVICE_REFERENCE = 3
+	CHANNEL_PICON_URL = 4
+	CHANNEL_PICON_PATH = 5
+	CHANNEL_SIGNATURE = 6
 
 	TV_SERVICE_TYPES = ("1:7:1:0:0:0:0:0:0:0:(type == 1) || (type == 17) || (type == 22) || (type == 25) || (type == 134) || (type == 195)")
 
-	def __init__(self, verbose):
-		self.verbose = verbose
+	def __init__(self):
+		self.listeners = []  # Callables given the action, progress and status of the update.
+		self.uiState = [_("Pluto TV Update"), 0, _("Please wait...")]
 		self.bouquetRegionList = []
 		self.updateActive = False
 		self.abort = False
+		self.piconLock = Lock()
+		self.piconProgress = 0.0
+		self.piconIncrement = 0.0
+		self.piconManifest = {}
+		self.piconManifestModified = False
+		self.piconDeadline = PlutoDeadline(0)
+		self.journal = {"started": 0, "settings": None, "regions": {}}
+		self.guideTransformer = None
+		self.guideProcess = None
+		self.guideHorizon = {}
+		self.guideFingerprints = {}
+		self.guideWorker = "update"
+		self.summary = ""
+		self.timings = PlutoTimings()
+		self.degraded = set()  # Regions for which the update had to fall back to the last good data.
+		self.lastGoodImported = set()
 		# self.timer = eTimer()
 		# self.timer.callback.append(self.uiUpdate)
 
 	def uiUpdate(self, action=None, progress=None, status=None, pause=0):
-		if self.verbose:
-			if action is not None:
-				self.setTitle(action)
-				self["action"].setText(action)
-			if progress is not None:
-				self["progress"].setValue(progress)
-				self["percentage"].setText(f"{progress}%")
-			if status is not None:
-				self["status"].setText(status)
-			# self.timer.start(1, True)
-			if pause:
-				sleep(pause)
+		for index, value in enumerate((action, progress, status)):
+			if value is not None:
+				self.uiState[index] = value
+		listeners = self.listeners[:]
+		for listener in listeners:
+			listener(action, progress, status)
+		# self.timer.start(1, True)
+		if pause and listeners:  # Only slow down when someone is watching.
+			sleep(pause)
+
+	def attach(self, listener):  # The listener is immediately given the current state of the update.
+		self.listeners.append(listener)
+		listener(*self.uiState)
+
+	def detach(self, listener):
+		if listener in self.listeners:
+			self.listeners.remove(listener)
+
+	def regionQueue(self, bouquetRegionList):  # Yield the regions whose bouquets are to be built.
+		yield from bouquetRegionList
+
+	def configuredServiceTypes(self):  # Return {Region: Service type} of the bouquet regions in the settings.
+		return {config.plugins.PlutoTV.bouquetRegion[x].value: config.plugins.PlutoTV.bouquetService[x].value for x in range(config.plugins.PlutoTV.bouquetCount.value)}
+
+	def updateServiceTypes(self):  # Return {Region: Service type} used for the whole update.
+		return self.configuredServiceTypes()
+
+	def stageDeadline(self, stage):
+		return PlutoDeadline(PLUTO_STAGE_BUDGETS[stage], lambda: self.abort)
+
+	def loadJournal(self, bouquetRegionList):
+		settings = (tuple(bouquetRegionList), tuple(sorted(self.serviceTypes.items())), self.addSamsung, self.addXiaomi, self.liveMode, self.channelNumbering, self.piconMode, config.plugins.PlutoTV.piconPath.value)
+		self.journal = {"started": int(time()), "settings": settings, "regions": {}}  # Regions: {Region: {Stage: Result}}.
+		path = join(PLUTO_FOLDER, PLUTO_JOURNAL)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					journal = load(fd)
+				if journal["settings"] == settings and int(time()) - journal["started"] < PLUTO_JOURNAL_LIFETIME:
+					print(f"[PlutoTV] Resuming the interrupted update started at {strftime("%H:%M:%S", localtime(journal["started"]))}.")
+					self.journal = journal
+				else:
+					self.clearJournal()
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load update journal '{path}'!  ({err})")
 
-	def updateThread(self):
-		def assignNumber():
-			nonlocal serviceNumbers, serviceNumbersModified
-			if identifier in serviceNumbers:
-				number = serviceNumbers[identifier]["number"]
+	def saveJournal(self):
+		path = join(PLUTO_FOLDER, PLUTO_JOURNAL)
+		try:
+			with open(f"{path}.tmp", "wb") as fd:
+				dump(self.journal, fd, protocol=5)
+			replace(f"{path}.tmp", path)  # The journal must never be left half written.
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save update journal '{path}'!  ({err.strerror})")
+
+	def clearJournal(self):  # An update that completed has nothing to resume.
+		for name in [PLUTO_JOURNAL] + [x for x in listdir(PLUTO_FOLDER) if x.startswith("stage_") and x.endswith(".cache")]:
+			try:
+				remove(join(PLUTO_FOLDER, name))
+			except OSError:
+				pass
+
+	def stageResult(self, region, stage):
+		return self.journal["regions"].get(region, {}).get(stage)
+
+	def completeStage(self, region, stage, result=True, cache=None):
+		if cache is not None:  # Keep the fetched data so that a resumed update does not need to fetch it again.
+			path = self.stageCachePath(region, stage)
+			try:
+				with open(path, "wb") as fd:
+					dump(cache, fd, protocol=5)
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to save '{stage}' data '{path}'!  ({err.strerror})")
+				return
+		self.journal["regions"].setdefault(region, {})[stage] = result
+		self.saveJournal()
+
+	def stageCachePath(self, region, stage):
+		return join(PLUTO_FOLDER, f"stage_{region}_{stage}.cache")
+
+	def loadStageCache(self, region, stage):
+		if self.stageResult(region, stage):
+			path = self.stageCachePath(region, stage)
+			try:
+				with open(path, "rb") as fd:
+					data = load(fd)
+				print(f"[PlutoTV] Using the '{stage}' data of the interrupted update for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+				return data
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load '{stage}' data '{path}'!  ({err})")
+		return None
+
+	def lastGoodPath(self, region, stage):
+		return join(PLUTO_FOLDER, f"lastgood_{region}_{stage}.cache")
+
+	def saveLastGoodLineup(self, region, channels):
+		path = self.lastGoodPath(region, "lineup")
+		try:
+			with open(f"{path}.tmp", "wb") as fd:
+				dump(channels, fd, protocol=5)
+			replace(f"{path}.tmp", path)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save last good lineup '{path}'!  ({err.strerror})")
+
+	def loadLastGoodLineup(self, region):
+		path = self.lastGoodPath(region, "lineup")
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					channels = load(fd)
+				print(f"[PlutoTV] Using the last good lineup for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+				return channels
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load last good lineup '{path}'!  ({err})")
+		return []
+
+	def lastGoodGuides(self, region):  # Return {Path: (Start, Stop)} of the last good guide windows that have not yet ended.
+		guides = {}
+		prefix = f"lastgood_{region}_guide-"
+		now = int(time())
+		for name in listdir(PLUTO_FOLDER):
+			if name.startswith(prefix) and name.endswith(".cache"):
+				start, stop = (int(x) for x in name[len(prefix):-6].split("-"))
+				path = join(PLUTO_FOLDER, name)
+				if stop > now:
+					guides[path] = (start, stop)
+				else:
+					try:
+						remove(path)
+					except OSError:
+						pass
+		return guides
+
+	def saveLastGoodGuide(self, region, guidePath, start, stop):  # The guide file is linked rather than copied where possible.
+		path = self.lastGoodPath(region, f"guide-{start}-{stop}")
+		try:
+			for oldPath, (oldStart, oldStop) in self.lastGoodGuides(region).items():  # A newer guide replaces the windows it covers.
+				if oldStart >= start and oldStop <= stop:
+					remove(oldPath)
+			try:
+				link(guidePath, path)
+			except OSError:
+				copy2(guidePath, path)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save last good guide '{path}'!  ({err.strerror})")
+
+	def removeLastGood(self, regions):  # Remove the last good data of the regions that are no longer bouquet regions.
+		for name in listdir(PLUTO_FOLDER):
+			if name.startswith("lastgood_") and name.split("_")[1] not in regions:
+				try:
+					remove(join(PLUTO_FOLDER, name))
+				except OSError as err:
+					print(f"[PlutoTV] Error {err.errno}: Unable to remove last good data '{name}'!  ({err.strerror})")
+
+	def importLastGoodGuides(self, region, serviceReferences, progress, progressRange):  # The imported events do not extend the EPG horizon so they are fetched again.
+		self.degraded.add(region)
+		for path, (start, stop) in sorted(self.lastGoodGuides(region).items(), key=lambda x: x[1]):
+			if path in self.lastGoodImported or self.abort:
+				continue
+			print(f"[PlutoTV] Using the last good EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' from {strftime("%Y-%m-%d %H:%M", localtime(start))} to {strftime("%Y-%m-%d %H:%M", localtime(stop))}.")
+			self.importGuide(region, self.transformGuide(path, serviceReferences), serviceReferences, progress, progressRange)
+			self.lastGoodImported.add(path)
+
+	def loadPiconManifest(self):
+		self.piconManifest = {"urls": {}, "picons": {}}  # URLs: {"etag", "modified", "hash", "checked"}, Picons: picon path -> hash.
+		self.piconManifestModified = False
+		self.piconValidated = set()  # URLs already validated during this update.
+		path = join(PLUTO_FOLDER, PLUTO_PICON_MANIFEST)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					manifest = load(fd)
+				if "urls" in manifest and "picons" in manifest:  # Older per picon manifests are discarded.
+					self.piconManifest = manifest
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to load picon manifest '{path}'!  ({err.strerror})")
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load picon manifest '{path}'!  ({err})")
+		self.piconStore = join(config.plugins.PlutoTV.piconPath.value, PLUTO_PICON_STORE)  # The store must be on the same file system as the picons for hard links.
+		try:
+			makedirs(self.piconStore, exist_ok=True)
+			with open(resolveFilename(SCOPE_PLUGIN_ABSOLUTE, "images/pluto_picon.png"), "rb") as fd:
+				content = fd.read()
+			self.piconPlaceholder = sha1(content).hexdigest()
+			self.storePiconBlob(self.piconPlaceholder, content)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to prepare picon store '{self.piconStore}'!  ({err.strerror})")
+			self.piconPlaceholder = None
+
+	def savePiconManifest(self):
+		with self.piconLock:  # Picon workers abandoned by an expired deadline may still be finishing.
+			if self.piconManifestModified:
+				path = join(PLUTO_FOLDER, PLUTO_PICON_MANIFEST)
+				picons = self.piconManifest["picons"]
+				for piconPath in [x for x in picons.keys() if not isfile(x)]:  # Forget picons that have been deleted.
+					del picons[piconPath]
+				referenced = set(picons.values()) | {self.piconPlaceholder}
+				for url in [x for x, y in self.piconManifest["urls"].items() if y["hash"] not in referenced]:  # Forget images no service uses any more.
+					del self.piconManifest["urls"][url]
+				try:
+					for blob in listdir(self.piconStore):
+						if blob.endswith(".png") and blob[:-4] not in referenced:
+							remove(join(self.piconStore, blob))
+				except OSError as err:
+					print(f"[PlutoTV] Error {err.errno}: Unable to clean picon store '{self.piconStore}'!  ({err.strerror})")
+				try:
+					with open(path, "wb") as fd:
+						dump(self.piconManifest, fd, protocol=5)
+						self.piconManifestModified = False
+				except OSError as err:
+					print(f"[PlutoTV] Error {err.errno}: Unable to save picon manifest '{path}'!  ({err.strerror})")
+			self.piconManifest = {"urls": {}, "picons": {}}
+			self.piconValidated.clear()
+
+	def storePiconBlob(self, digest, content):
+		blobPath = join(self.piconStore, f"{digest}.png")
+		if not isfile(blobPath):  # Identical images are only ever written once.
+			with open(f"{blobPath}.tmp", "wb") as fd:
+				fd.write(content)
+			replace(f"{blobPath}.tmp", blobPath)
+
+	def linkPicon(self, piconPath, digest):
+		blobPath = join(self.piconStore, f"{digest}.png")
+		try:
+			if self.piconManifest["picons"].get(piconPath) == digest and samefile(piconPath, blobPath):
+				return
+		except OSError:
+			pass
+		tempPath = f"{piconPath}.tmp"
+		if lexists(tempPath):
+			remove(tempPath)
+		try:
+			link(blobPath, tempPath)
+		except OSError:  # Fall back to a symbolic link and then a copy if the file system does not support hard links.
+			try:
+				symlink(blobPath, tempPath)
+			except OSError:
+				copy2(blobPath, tempPath)
+		replace(tempPath, piconPath)
+		with self.piconLock:
+			self.piconManifest["picons"][piconPath] = digest
+			self.piconManifestModified = True
+
+	def fetchPicon(self, piconURL):  # Return the hash of the image for this URL, downloading it at most once per update.
+		if "missing.png" in piconURL or "MISSING" in piconURL:
+			# print("[PlutoTV] DEBUG: Don't try fetching the 'missing.png' or 'MISSING' picon!")
+			return self.piconPlaceholder
+		entry = self.piconManifest["urls"].get(piconURL)
+		known = entry is not None and isfile(join(self.piconStore, f"{entry["hash"]}.png"))
+		force = config.plugins.PlutoTV.forcePiconDownload.value
+		if known and (piconURL in self.piconValidated or (not force and int(time()) - entry["checked"] < PLUTO_PICON_REVALIDATE)):
+			# print(f"[PlutoTV] DEBUG: Not checking '{piconURL}' as it was recently validated.")
+			return entry["hash"]
+		header = {}
+		if known and not force:  # Only ask for the picon if it has changed since the last download.
+			if entry["etag"]:
+				header["If-None-Match"] = entry["etag"]
+			if entry["modified"]:
+				header["If-Modified-Since"] = entry["modified"]
+		# print(f"[PlutoTV] DEBUG: Fetching '{piconURL}' with {header}.")
+		response = limitedGet(piconURL, headers=header, timeout=self.piconDeadline.timeout())
+		if response.status_code == 304:
+			entry = entry | {"checked": int(time())}
+		else:
+			response.raise_for_status()
+			content = response.content
+			plutoBandwidth.consume(len(content))
+			digest = sha1(content).hexdigest()
+			self.storePiconBlob(digest, content)
+			entry = {"etag": response.headers.get("ETag"), "modified": response.headers.get("Last-Modified"), "hash": digest, "checked": int(time())}
+		with self.piconLock:
+			self.piconManifest["urls"][piconURL] = entry
+			self.piconManifestModified = True
+			self.piconValidated.add(piconURL)
+		return entry["hash"]
+
+	def updatePicon(self, name, piconURL, piconPaths):  # This runs in a picon worker thread.
+		if self.piconDeadline.expired():
+			return
+		plutoWorkers.yieldToForeground("picons")
+		with self.piconLock:
+			self.piconProgress += self.piconIncrement * len(piconPaths)
+			progress = round(self.piconProgress)
+		self.uiUpdate(progress=progress, status=_("Downloading '%s' picon.") % name)
+		try:
+			with self.timings.span("picon fetch"):
+				digest = self.fetchPicon(piconURL)
+		except PlutoThrottled as err:  # Leave the picon as it is, the next update will try again.
+			print(f"[PlutoTV] Picon '{piconURL}' not checked.  ({err})")
+			return
+		except Exception as err:
+			print(f"[PlutoTV] Error: Unable to download picon '{piconURL}'!  ({err})")
+			digest = None
+		for piconPath in piconPaths:
+			try:
+				if digest:
+					self.linkPicon(piconPath, digest)
+				elif not lexists(piconPath) and self.piconPlaceholder:  # Keep the previous picon rather than replacing it with the place holder.
+					self.linkPicon(piconPath, self.piconPlaceholder)
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to create picon '{piconPath}'!  ({err.strerror})")
+
+	def writeBouquet(self, region, path, bouquetData):
+		oldData = fileReadLines(path, default=[], source=MODULE_NAME)
+		if bouquetFingerprint(oldData) == bouquetFingerprint(bouquetData):
+			return False
+		if oldData:
+			oldServices = set(x for x in oldData if x.startswith("#SERVICE "))
+			newServices = set(x for x in bouquetData if x.startswith("#SERVICE "))
+			added = [x for x in bouquetData if x in newServices and x not in oldServices]
+			removed = [x for x in oldData if x in oldServices and x not in newServices]
+			print(f"[PlutoTV] Bouquet for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' changed, {len(added)} service(s) added and {len(removed)} service(s) removed.")
+			for prefix, services in (("+", added), ("-", removed)):
+				for service in services:
+					print(f"[PlutoTV]   {prefix} {service.rsplit(":", 1)[-1].replace("%3A", ":")}")
+		else:
+			print(f"[PlutoTV] New bouquet for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' with {sum(1 for x in bouquetData if x.startswith("#SERVICE "))} entries.")
+		fileWriteLines(path, bouquetData, source=MODULE_NAME)
+		return True
+
+	def loadServiceNumbers(self):
+		self.serviceNumbers = {"lastNumber": 0}
+		self.serviceNumbersModified = False
+		if isfile(PLUTO_SERVICE_NUMBER_PATH):
+			print("[PlutoTV] Reading service numbers.")
+			try:
+				with open(PLUTO_SERVICE_NUMBER_PATH, "rb") as fd:
+					self.serviceNumbers = load(fd)
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to load service numbers '{PLUTO_SERVICE_NUMBER_PATH}'!  ({err.strerror})")
+
+	def saveServiceNumbers(self):
+		if self.serviceNumbersModified:
+			print("[PlutoTV] Saving service numbers.")
+			try:
+				with open(PLUTO_SERVICE_NUMBER_PATH, "wb") as fd:
+					dump(self.serviceNumbers, fd, protocol=5)
+					self.serviceNumbersModified = False
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to save service numbers to '{PLUTO_SERVICE_NUMBER_PATH}'!  ({err.strerror})")
+
+	def assignNumber(self, identifier, name):
+		serviceNumbers = self.serviceNumbers
+		if identifier in serviceNumbers:
+			number = serviceNumbers[identifier]["number"]
+		else:
+			number = serviceNumbers["lastNumber"] + 1
+			if number <= 65535:
+				serviceNumbers["lastNumber"] = number
+				number = f"{number:X}"  # Convert the number to hexadecimal.
+				serviceNumbers[identifier] = {}
+				serviceNumbers[identifier]["number"] = number
+				serviceNumbers[identifier]["name"] = name
+				self.serviceNumbersModified = True
 			else:
-				number = serviceNumbers["lastNumber"] + 1
-				if number <= 65535:
-					serviceNumbers["lastNumber"] = number
-					number = f"{number:X}"  # Convert the number to hexadecimal.
-					serviceNumbers[identifier] = {}
-					serviceNumbers[identifier]["number"] = number
-					serviceNumbers[identifier]["name"] = name
-					serviceNumbersModified = True
+				self.uiUpdate(status=_("Error: Generated channel number too big!  (%s)") % number)
+				number = None
+		# print(f"[PlutoTV] ALERT: Identifier '{identifier}, name '{name}' number '{number}'.")
+		return number
+
+	def channelSettings(self):  # These settings are baked into the cached channel entries.
+		return (self.liveMode, self.channelNumbering, self.piconMode, config.plugins.PlutoTV.piconPath.value, self.addDescriptions)
+
+	def loadChannelCache(self):
+		self.channelCache = {}  # Region: {Channel identifier: Channel entry}.
+		self.channelCacheModified = False
+		path = join(PLUTO_FOLDER, PLUTO_CHANNEL_CACHE)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					channelCache = load(fd)
+				if channelCache.get("settings") == self.channelSettings():  # Entries built with other settings can't be reused.
+					self.channelCache = channelCache.get("regions", {})
+				else:
+					print("[PlutoTV] Channel settings have changed, all channels will be rebuilt.")
+					self.channelCacheModified = True
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to load channel cache '{path}'!  ({err.strerror})")
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load channel cache '{path}'!  ({err})")
+		regions = [x.value for x in config.plugins.PlutoTV.bouquetRegion]
+		for region in list(self.channelCache.keys()):  # Forget regions no longer in use.
+			if region not in regions:
+				del self.channelCache[region]
+				self.channelCacheModified = True
+
+	def saveChannelCache(self):
+		if self.channelCacheModified:
+			path = join(PLUTO_FOLDER, PLUTO_CHANNEL_CACHE)
+			try:
+				with open(f"{path}.tmp", "wb") as fd:
+					dump({"settings": self.channelSettings(), "regions": self.channelCache}, fd, protocol=5)
+				replace(f"{path}.tmp", path)
+				self.channelCacheModified = False
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to save channel cache '{path}'!  ({err.strerror})")
+		self.channelCache = {}
+
+	def updateBouquet(self, region):  # Returns the service references, if the bouquet changed and if the bouquet needs to be installed.
+		print(f"[PlutoTV] Fetching {PLUTO_DATA[region][PLUTO_COUNTRY_NAME]} carousel data.")
+		progress = 0
+		self.uiUpdate(action=_("Pluto TV Update - %s") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], progress=progress, status=_("Fetching %s carousel data.") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], pause=0.5)
+		param = {
+			"deviceId": deviceIdentifier(),
+			"sid": sessionIdentifier()
+		}
+		header = buildHeader(PLUTO_DATA[region][PLUTO_IP])
+		channels = self.loadStageCache(region, "lineup")
+		if channels is None and config.plugins.PlutoTV.singleFetch.value:  # Build the lineup from the now/next guide, which is then imported without being fetched again.
+			now = int(time())
+			guideWindow = (now - now % 3600, now - now % 3600 + PLUTO_GUIDE_NOW_NEXT)
+			with self.timings.span("lineup fetch", region):
+				guidePath = self.fetchGuide(region, *guideWindow, stage="lineup")
+			if guidePath:
+				with self.timings.span("lineup parse", region), open(guidePath, encoding="UTF-8") as fd:
+					channels = sorted(({x: y for x, y in channel.items() if x != "timelines"} for channel in iterJSONArray(fd)), key=lambda x: x["number"])
+				if channels:
+					self.completeStage(region, "lineup", {"guide": guideWindow}, cache=channels)
+					self.saveLastGoodLineup(region, channels)
 				else:
-					self.uiUpdate(status=_("Error: Generated channel number too big!  (%s)") % number)
-					number = None
-			# print(f"[PlutoTV] ALERT: Identifier '{identifier}, name '{name}' number '{number}'.")
-			return number
+					channels = None  # An empty guide is not a lineup, so the lineup is fetched and the fallbacks apply.
+		if channels is None:
+			deadline = self.stageDeadline("lineup")
+			with self.timings.span("lineup fetch", region):
+				channels = sorted(plutoWorkers.runCancellable("fetch", deadline, fetchURL, PLUTO_LINEUP_URL, header=header, param=param, deadline=deadline, shaped=True) or [], key=lambda x: x["number"])
+			# channelsDump(region, channels)
+			if channels:
+				self.completeStage(region, "lineup", cache=channels)
+				self.saveLastGoodLineup(region, channels)
+			elif not self.abort:  # The bouquet is rebuilt, unchanged, from the last good lineup and the update is retried soon.
+				self.degraded.add(region)
+				channels = self.loadLastGoodLineup(region)
+		channelCount = len(channels)
+		if self.abort:
+			return None, False, False
+		print("[PlutoTV] Building category and channel lists.")
+		progress += 1
+		self.uiUpdate(progress=progress, status=_("Building category and channel lists."), pause=0.5)
+		categories = []
+		channelList = {}
+		channelCache = self.channelCache.get(region, {})
+		self.channelCache[region] = {}  # Only channels still in the lineup are kept.
+		serviceType = self.serviceTypes[region]
+		tids = PLUTO_DATA[region][PLUTO_TIDS]
+		reused = 0
+		begin = perf_counter()
+		for channel in channels:
+			# identifier = channel.get("_id", "")
+			# slug = channel.get("slug", "")
+			# name = channel.get("name", "")
+			# hash = channel.get("hash", "")
+			# number = channel.get("number", 0)
+			# summary = channel.get("summary", "")
+			# visibility = channel.get("visibility", "")
+			# onDemandDescription = channel.get("onDemandDescription", "")
+			# category = channel.get("category", "")
+			# plutoOfficeOnly = channel.get("plutoOfficeOnly", False)
+			# directOnly = channel.get("directOnly", False)
+			# chatRoomId = channel.get("chatRoomId", -1)
+			# cohortMask = channel.get("cohortMask", 0)
+			# featuredImage = channel.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# thumbnail = channel.get("thumbnail", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# tile = channel.get("tile", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# logo = channel.get("logo", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# colorLogoSVG = channel.get("colorLogoSVG", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# colorLogoPNG = channel.get("colorLogoPNG", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# solidLogoSVG = channel.get("solidLogoSVG", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# solidLogoPNG = channel.get("solidLogoPNG", {})  # Typically key "path" as a URL to a background or screen shot image.
+			# featured = channel.get("featured", False)
+			# featuredOrder = channel.get("featuredOrder", 0)
+			# favorite = channel.get("favorite", False)
+			# isStitched = channel.get("isStitched", False)
+			# stitched = channel.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
+			# tmsid = channel.get("tmsid", "")
+			if self.abort:
+				break
+			category = channel.get("category", "")
+			if (category == "Samsung" and not self.addSamsung) or (category == "Xiaomi TV" and not self.addXiaomi):
+				continue
+			if category not in channelList.keys():
+				categories.append(category)
+				channelList[category] = []
+			signature = (channel.get("hash"), category, channel.get("number"), serviceType, tids)  # The transport IDs of the region are part of the service reference and picon name.
+			entry = channelCache.get(channel.get("_id"))
+			if signature[0] and entry and entry[self.CHANNEL_SIGNATURE] == signature and (entry[self.CHANNEL_IDENTIFIER] in self.serviceNumbers or (self.channelNumbering == "original" and signature[2])):
+				channelList[category].append(entry)  # This channel has not changed since the last update.
+				self.channelCache[region][entry[self.CHANNEL_IDENTIFIER]] = entry
+				reused += 1
+				continue
+			urls = channel.get("stitched", {}).get("urls")
+			if not isinstance(urls, list) or len(urls) == 0:
+				print("[PlutoTV] Categories without URLs are not being added.")
+				continue
+			identifier = channel["_id"]
+			match self.liveMode:
+				case "original":
+					url = [updateQuery(x["url"], {
+						"deviceType": "web",
+						"deviceMake": "Chrome",
+						"deviceModel": "web",
+						"appName": "web",
+						"deviceId": "bc83a564-4b91-11ef-8a44-83c5e90e038f"
+					}) for x in urls if x["type"].lower() == "hls"][0]
+				case "roku":
+					url = "&".join((
+						f"https://stitcher-ipv4.pluto.tv/v1/stitch/embed/hls/channel/{identifier}/master.m3u8?deviceId=PSID",
+						"deviceModel=web",
+						"deviceVersion=1.0",
+						"appVersion=1.0",
+						"deviceType=rokuChannel",
+						"deviceMake=rokuChannel",
+						"deviceDNT=1"
+					))
+				case "samsung":
+					url = "&".join((
+						f"https://stitcher-ipv4.pluto.tv/v1/stitch/embed/hls/channel/{identifier}/master.m3u8?deviceType=samsung-tvplus",
+						"deviceMake=samsung",
+						"deviceModel=samsung",
+						"deviceVersion=unknown",
+						"appVersion=unknown",
+						"deviceLat=0",
+						"deviceLon=0",
+						"deviceDNT=%7BTARGETOPT%7D",
+						"deviceId=%7BPSID%7D",
+						"advertisingId=%7BPSID%7D",
+						"us_privacy=1YNY",
+						"samsung_app_domain=%7BAPP_DOMAIN%7D",
+						"samsung_app_name=%7BAPP_NAME%7D",
+						"profileLimit=",
+						"profileFloor=",
+						"embedPartner=samsung-tvplus"
+					))
+			name = channel["name"]
+			if self.channelNumbering == "original":
+				match category:
+					case "Samsung":
+						number = identifier[-4:].upper().lstrip("0")
+					case "Xiaomi TV":
+						number = identifier[-4:].upper().lstrip("0")
+					case _:
+						number = channel.get("number", 0)
+						if number:
+							number = f"{int(number):X}"
+						else:
+							number = self.assignNumber(identifier, name)
+							if number is None:
+								self.result = self.EXIT_ERROR
+								break
+			else:
+				number = self.assignNumber(identifier, name)
+				if number is None:
+					self.result = self.EXIT_ERROR
+					break
+			lines = [f"#SERVICE {serviceType}:0:1:{number}:{tids}:0:0:0:0:0:{url.replace(":", "%3A")}:{name.replace(":", "%3A")}"]
+			if self.addDescriptions:
+				lines.append(f"#DESCRIPTION {name}")
+			serviceReference = f"{serviceType}:0:1:{number}:{tids}:0:0:0:0:0"
+			piconURL = f"{channel.get("colorLogoPNG", {}).get("path", None)}?w=220&h=132"  # Fetch the FHD resolution image.
+			match self.piconMode:
+				case "srp":
+					piconBaseName = serviceReference.replace(":", "_")
+				case "name":
+					piconBaseName = str(name).replace("/", "_")
+				case "snp":
+					from unicodedata import normalize  # Only SNP picon names need unicodedata.
+					piconBaseName = normalize("NFKD", name).encode("ASCII", "ignore").decode()
+					piconBaseName = sub(r"[^a-z0-9]", "", piconBaseName.replace("&", "and").replace("+", "plus").replace("*", "star").lower())
+			piconPath = join(config.plugins.PlutoTV.piconPath.value, f"{piconBaseName}.png")
+			# print(f"[PlutoTV] DEBUG: piconURL={piconURL}, piconBaseName={piconBaseName}, piconPath={piconPath}.")
+			entry = (identifier, name, lines, f"{serviceReference}:0", piconURL, piconPath, signature)
+			channelList[category].append(entry)
+			self.channelCache[region][identifier] = entry
+			self.channelCacheModified = True
+		self.timings.record("channels", region, perf_counter() - begin)
+		if self.abort:
+			return None, False, False
+		categories = [x for x in categories if channelList[x]]
+		if reused:
+			print(f"[PlutoTV] {reused} unchanged channels reused from the last update.")
+		if len(self.channelCache[region]) != len(channelCache):
+			self.channelCacheModified = True
+		if not categories:
+			print(f"[PlutoTV] Pluto TV may not be available in '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+			self.uiUpdate(status=_("Pluto TV may not be available in '%s'.") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], pause=10)
+			return None, False, False
+		print(f"[PlutoTV] Building bouquet '{region}' for '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+		progress += 1
+		self.uiUpdate(progress=progress, status=_("Building bouquet '%s' for '%s'.") % (region, PLUTO_DATA[region][PLUTO_COUNTRY_NAME]))
+		bouquet = f"userbouquet.pluto_tv_{region.lower()}.tv"
+		serviceReferences = {}
+		bouquetData = []
+		piconJobs = {}
+		bouquetData.append(f"#NAME Pluto TV {region} (TV)")
+		increment = 48.0 / channelCount  # This part of the processing constitutes 49% of the total progress.
+		for counter, category in enumerate(categories):
+			if self.abort:
+				break
+			bouquetData.append(f"#SERVICE 1:64:{counter}:0:0:0:0:0:0:0::{category}")
+			if self.addDescriptions:
+				bouquetData.append(f"#DESCRIPTION {category}")
+			for channel in channelList[category]:
+				bouquetData.extend(channel[self.CHANNEL_LINES])
+				serviceReferences[channel[self.CHANNEL_IDENTIFIER]] = channel[self.CHANNEL_SERVICE_REFERENCE]
+				name = channel[self.CHANNEL_NAME]
+				piconURL = channel[self.CHANNEL_PICON_URL]
+				piconPath = channel[self.CHANNEL_PICON_PATH]
+				if piconURL in piconJobs:  # Services sharing an image only fetch it once.
+					piconJobs[piconURL][2].append(piconPath)
+				else:
+					piconJobs[piconURL] = (name, piconURL, [piconPath])
+		if self.abort:
+			return None, False, False
+		if not self.stageResult(region, "picons"):
+			self.piconProgress = progress
+			self.piconIncrement = increment
+			self.piconDeadline = self.stageDeadline("picons")
+			with self.timings.span("picons", region):
+				plutoWorkers.runBatch("picons", self.updatePicon, list(piconJobs.values()), deadline=self.piconDeadline)  # Picons are fetched in parallel by the picon workers.
+			if self.abort:
+				return None, False, False
+			if self.piconDeadline.expired():
+				print(f"[PlutoTV] Picon update for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' ran out of time, the remaining picons will be fetched by the next update.")
+			self.completeStage(region, "picons")
+		self.uiUpdate(progress=49)
+		bouquetResult = self.stageResult(region, "bouquet")
+		if bouquetResult:
+			bouquetChanged = bouquetResult["changed"]  # The bouquet was written but may not yet have been loaded.
+		else:
+			bouquetData.append("")
+			with self.timings.span("bouquet write", region):
+				bouquetChanged = self.writeBouquet(region, resolveFilename(SCOPE_CONFIG, bouquet), bouquetData)
+			self.completeStage(region, "bouquet", {"changed": bouquetChanged})
+		bouquets = fileReadLines(resolveFilename(SCOPE_CONFIG, "bouquets.tv"), [], source=MODULE_NAME)
+		return serviceReferences, bouquetChanged, not any(f"\"{bouquet}\"" in x for x in bouquets)
+
+	def commitBouquets(self, installRegions):  # Apply the bouquet changes of all regions with a single reload.
+		dvbDB = eDVBDB.getInstance()
+		serviceHandler = eServiceCenter.getInstance()
+		newBouquets = []
+		if installRegions:
+			bouquetRootString = "1:7:1:0:0:0:0:0:0:0:FROM BOUQUET \"bouquets.tv\" ORDER BY bouquet" if config.usage.multibouquet.value else f"{self.TV_SERVICE_TYPES} FROM BOUQUET \"userbouquet.favourites.tv\" ORDER BY bouquet"
+			bouquetRoot = eServiceReference(bouquetRootString)
+			mutableBouquetList = serviceHandler.list(bouquetRoot).startEdit()
+			if mutableBouquetList:
+				for region in installRegions:
+					print(f"[PlutoTV] Install bouquet for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+					newBouquetReference = eServiceReference(f"1:7:1:0:0:0:0:0:0:0:FROM BOUQUET \"userbouquet.pluto_tv_{region.lower()}.tv\" ORDER BY bouquet")
+					if not mutableBouquetList.addService(newBouquetReference):
+						newBouquets.append((region, newBouquetReference))
+				mutableBouquetList.flushChanges()
+		print("[PlutoTV] Reloading service list and bouquets.")
+		self.uiUpdate(action=_("Pluto TV Update"), status=_("Reloading service list and bouquets."))
+		dvbDB.reloadServicelist()
+		dvbDB.reloadBouquets()
+		for region, newBouquetReference in newBouquets:
+			mutableBouquet = serviceHandler.list(newBouquetReference).startEdit()
+			if mutableBouquet:
+				mutableBouquet.setListName(f"Pluto TV {region} (TV)")
+				mutableBouquet.flushChanges()
+			else:
+				print("[PlutoTV] Error: Get mutable list for newly created bouquet failed!")
+
+	def loadGuideHorizon(self):
+		self.guideHorizon = {}  # Region: {Service reference: End of the imported EPG}.
+		path = join(PLUTO_FOLDER, PLUTO_GUIDE_HORIZON)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					guideHorizon = load(fd)
+				regions = [x.value for x in config.plugins.PlutoTV.bouquetRegion]
+				now = int(time())
+				for region, covered in guideHorizon.items():  # Forget regions no longer in use and windows that have passed.
+					if region in regions:
+						self.guideHorizon[region] = {x: y for x, y in covered.items() if y > now}
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to load EPG horizon '{path}'!  ({err.strerror})")
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load EPG horizon '{path}'!  ({err})")
+
+	def saveGuideHorizon(self):
+		path = join(PLUTO_FOLDER, PLUTO_GUIDE_HORIZON)
+		try:
+			with open(path, "wb") as fd:
+				dump(self.guideHorizon, fd, protocol=5)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save EPG horizon '{path}'!  ({err.strerror})")
+
+	def loadGuideFingerprints(self):
+		self.guideFingerprints = {}  # Service reference: {Start: (Duration, Title and plot checksum)}.
+		path = join(PLUTO_FOLDER, PLUTO_GUIDE_FINGERPRINTS)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					guideFingerprints = load(fd)
+				now = int(time())
+				for serviceReference, fingerprints in guideFingerprints.items():  # Forget events that have finished.
+					if fingerprints := {x: y for x, y in fingerprints.items() if x + y[0] > now}:
+						self.guideFingerprints[serviceReference] = fingerprints
+			except OSError as err:
+				print(f"[PlutoTV] Error {err.errno}: Unable to load EPG fingerprints '{path}'!  ({err.strerror})")
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load EPG fingerprints '{path}'!  ({err})")
+
+	def saveGuideFingerprints(self):
+		path = join(PLUTO_FOLDER, PLUTO_GUIDE_FINGERPRINTS)
+		try:
+			with open(path, "wb") as fd:
+				dump(self.guideFingerprints, fd, protocol=5)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save EPG fingerprints '{path}'!  ({err.strerror})")
+		self.guideFingerprints = {}
+
+	def guideRequest(self, region, start, stop):  # Return the stage, the stage cache path, if it was already fetched and the query for this window.
+		stage = f"guide-{start}-{stop}"
+		guidePath = self.stageCachePath(region, stage)  # The guide is streamed to disk and parsed one channel at a time.
+		fetched = bool(self.stageResult(region, stage)) and isfile(guidePath)
+		if fetched:
+			print(f"[PlutoTV] Using the guide data already fetched for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' from {strftime("%Y-%m-%d %H:%M", localtime(start))} to {strftime("%Y-%m-%d %H:%M", localtime(stop))}.")
+		else:
+			print(f"[PlutoTV] Fetching EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' from {strftime("%Y-%m-%d %H:%M", localtime(start))} to {strftime("%Y-%m-%d %H:%M", localtime(stop))}.")
+		param = {
+			"start": strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(start)),
+			"stop": strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(stop)),
+			"deviceId": deviceIdentifier(),
+			"sid": sessionIdentifier(),
+		}
+		return stage, guidePath, fetched, param
+
+	def fetchGuide(self, region, start, stop, stage="guide"):  # Return the path of the stage cache file holding the guide for this window.
+		guideStage, guidePath, fetched, param = self.guideRequest(region, start, stop)
+		if fetched:
+			return guidePath
+		deadline = self.stageDeadline(stage)
+		if plutoWorkers.runCancellable("fetch", deadline, fetchFile, PLUTO_GUIDE_URL, guidePath, header=buildHeader(PLUTO_DATA[region][PLUTO_IP]), param=param, deadline=deadline, shaped=True):
+			self.completeStage(region, guideStage)
+			self.saveLastGoodGuide(region, guidePath, start, stop)
+			return guidePath
+		return None
+
+	def transformGuide(self, guidePath, serviceReferences):  # Yield (Channel identifier, Name, Events) for the channels in the bouquet.
+		with open(guidePath, encoding="UTF-8") as fd:
+			for guide in iterJSONArray(fd):
+				# identifier = guide.get("_id", "")
+				# slug = guide.get("slug", "")
+				# name = guide.get("name", "")
+				# hash = guide.get("hash", "")
+				# number = guide.get("number", 0)
+				# summary = guide.get("summary", "")
+				# visibility = guide.get("visibility", "")
+				# onDemandDescription = guide.get("onDemandDescription", "")
+				# category = guide.get("category", "")
+				# plutoOfficeOnly = guide.get("plutoOfficeOnly", False)
+				# directOnly = guide.get("directOnly", False)
+				# chatRoomId = guide.get("chatRoomId", -1)
+				# onDemand = guide.get("onDemand", False)
+				# cohortMask = guide.get("cohortMask", 0)
+				# featuredImage = guide.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
+				# thumbnail = guide.get("thumbnail", {})  # Typically key "path" as a URL to a background or promotional image.
+				# tile = guide.get("tile", {})  # Typically key "path" as a URL to a background or promotional image.
+				# tileGrayScale = guide.get("tileGrayScale", {})  # Typically key "path" as a URL to a background or promotional image.
+				# logo = guide.get("logo", {})  # Typically key "path" as a URL to a background or promotional image.
+				# colorLogoSVG = guide.get("colorLogoSVG", {})  # Typically key "path" as a URL to a background or promotional image.
+				# colorLogoPNG = guide.get("colorLogoPNG", {})  # Typically key "path" as a URL to a background or promotional image.
+				# solidLogoSVG = guide.get("solidLogoSVG", {})  # Typically key "path" as a URL to a background or promotional image.
+				# solidLogoPNG = guide.get("solidLogoPNG", {})  # Typically key "path" as a URL to a background or promotional image.
+				# featured = guide.get("featured", False)
+				# featuredOrder = guide.get("featuredOrder", -1)
+				# favorite = guide.get("favorite", False)
+				# isStitched = guide.get("isStitched", False)
+				# stitched = guide.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
+				# timelines = guide.get("timelines", [{}])
+				if guide.get("_id") in serviceReferences:  # Only channels in the bouquet need an EPG.
+					plutoWorkers.yieldToForeground(self.guideWorker)  # Let interactive browsing go first.
+					yield guide.get("_id"), guide.get("name", _("* Unknown *")), self.guideTransformer.transform(guide)
+
+	def updateGuide(self, region, serviceReferences, nowNext=False):
+		now = int(time())
+		windowStart = now - now % 3600
+		windowStop = windowStart + (PLUTO_GUIDE_NOW_NEXT if nowNext else config.plugins.PlutoTV.epgHours.value * 3600)
+		covered = self.guideHorizon.setdefault(region, {})
+		epgCache = eEPGCache.getInstance()
+		self.guideTransformer.startRegion()  # Keep the shared strings from growing across all the regions of the update.
+		if covered and not any(epgCache.lookupEventTime(eServiceReference(x), now) for x in covered):
+			print(f"[PlutoTV] The EPG cache no longer holds the events for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}', fetching the full EPG.")
+			for serviceReference in covered:
+				self.guideFingerprints.pop(serviceReference, None)
+			covered.clear()
+		lineupGuide = self.stageResult(region, "lineup")
+		if nowNext and isinstance(lineupGuide, dict):  # The guide used to build the bouquet is always imported.
+			windowStart, windowStop = lineupGuide["guide"]
+		else:
+			windowStart = max(windowStart, min(covered.get(x, 0) for x in serviceReferences.values()))  # Only fetch the hours not yet imported for every service.
+		if windowStart >= windowStop:
+			if not nowNext:
+				print(f"[PlutoTV] EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' is already loaded until {strftime("%Y-%m-%d %H:%M", localtime(windowStop))}.")
+				self.completeStage(region, "epg")
+			return
+		chunks = range(windowStart, windowStop, PLUTO_GUIDE_CHUNK)
+		for index, chunkStart in enumerate(chunks):
+			chunkStop = min(chunkStart + PLUTO_GUIDE_CHUNK, windowStop)
+			progress = 50 + index * 50 // len(chunks)
+			self.uiUpdate(action=_("Pluto TV Update - %s") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], progress=progress, status=_("Fetching EPG data."), pause=0.5)
+			with self.timings.span("guide fetch", region):  # The fetch stays in enigma2 so that it is rate limited and shaped with the other downloads.
+				guidePath = self.fetchGuide(region, chunkStart, chunkStop)
+			if guidePath is None and not self.abort:
+				self.importLastGoodGuides(region, serviceReferences, progress, 50 // len(chunks))
+			if guidePath is None or self.abort:
+				return
+			if config.plugins.PlutoTV.guideProcess.value:  # Only the EPG commit is done in the enigma2 process.
+				guides = PlutoGuideProcess(self, guidePath, serviceReferences.keys(), self.stageDeadline("guide"))
+				self.guideProcess = guides
+				try:
+					with self.timings.span("guide process", region):  # The parse in the guide process overlaps the import.
+						self.importGuide(region, guides, serviceReferences, progress, 50 // len(chunks))
+				finally:
+					self.guideProcess = None
+				if not guides.completed:  # Leave the window uncovered so that the next update tries again.
+					if not self.abort:
+						self.degraded.add(region)
+					return
+			else:
+				with self.timings.span("guide import", region):  # This includes parsing and transforming the guide.
+					self.importGuide(region, self.transformGuide(guidePath, serviceReferences), serviceReferences, progress, 50 // len(chunks))
+			if self.abort:
+				return
+			for serviceReference in serviceReferences.values():
+				covered[serviceReference] = max(covered.get(serviceReference, 0), chunkStop)
+			self.saveGuideHorizon()
+		if not nowNext:
+			self.completeStage(region, "epg")
+		self.uiUpdate(progress=100)
+
+	def importGuide(self, region, guides, serviceReferences, progress, progressRange):
+		print(f"[PlutoTV] Merge EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
+		eventCount = 0
+		skipCount = 0
+		serviceCount = 0
+		for identifier, name, events in guides:
+			if self.abort:
+				break
+			serviceReference = serviceReferences[identifier]
+			self.uiUpdate(progress=progress + serviceCount * progressRange // len(serviceReferences), status=_("Processing '%s' guides.") % name, pause=0.1)
+			fingerprints = self.guideFingerprints.setdefault(serviceReference, {})
+			changedEvents = []
+			for event in events:  # Only import events that are new or have changed since they were last imported.
+				fingerprint = (event[1], crc32(f"{event[2]}\n{event[4]}".encode()))
+				if fingerprints.get(event[0]) != fingerprint:
+					fingerprints[event[0]] = fingerprint
+					changedEvents.append(event)
+			if changedEvents:
+				with self.timings.span("epg commit", region):
+					plutoEPGCommitter.commit(serviceReference, changedEvents)  # Import each channel as soon as it is parsed so that only one channel is held in memory.
+			eventCount += len(changedEvents)
+			skipCount += len(events) - len(changedEvents)
+			serviceCount += 1
+		print(f"[PlutoTV] {eventCount} events merged and {skipCount} unchanged events skipped, for {serviceCount} channels.")
 
+	def updateThread(self):
 		if self.updateActive:
 			print("[PlutoTV] Carousel update is already in progress.")
 			return self.EXIT_RUNNING
 		self.updateActive = True
-		self.abort = False
 		print("[PlutoTV] Carousel update started.")
-		result = self.EXIT_DONE
+		self.result = self.EXIT_DONE
+		self.degraded.clear()
+		self.lastGoodImported.clear()
+		self.timings = PlutoTimings(config.plugins.PlutoTV.timingReport.value)
+		region = None
 		bouquetRegionList = self.bouquetRegionList if self.bouquetRegionList else [x.value for x in config.plugins.PlutoTV.bouquetRegion]
-		serviceTypes = {config.plugins.PlutoTV.bouquetRegion[x].value: config.plugins.PlutoTV.bouquetService[x].value for x in range(config.plugins.PlutoTV.bouquetCount.value)}
-		categories = []
-		channelList = {}
-		guideList = {}
-		addSamsung = config.plugins.PlutoTV.addSamsung.value
-		if not addSamsung:
+		self.serviceTypes = self.updateServiceTypes()
+		self.addSamsung = config.plugins.PlutoTV.addSamsung.value
+		if not self.addSamsung:
 			print("[PlutoTV] Samsung categories will not being added.")
-		addXiaomi = config.plugins.PlutoTV.addXiaomi.value
-		if not addXiaomi:
+		self.addXiaomi = config.plugins.PlutoTV.addXiaomi.value
+		if not self.addXiaomi:
 			print("[PlutoTV] Xiaomi TV categories will not being added.")
 		self.liveMode = config.plugins.PlutoTV.liveMode.value
 		self.channelNumbering = config.plugins.PlutoTV.channelNumbering.value
 		self.piconMode = config.plugins.PlutoTV.piconMode.value
+		self.addDescriptions = config.plugins.PlutoTV.addDescriptions.value
 		# print(f"[PlutoTV] DEBUG: bouquetRegionList={bouquetRegionList}.")
-		# print(f"[PlutoTV] DEBUG: serviceTypes={serviceTypes}.")
-		# print(f"[PlutoTV] DEBUG: addSamsung={addSamsung}.")
-		# print(f"[PlutoTV] DEBUG: addXiaomi={addXiaomi}.")
+		# print(f"[PlutoTV] DEBUG: serviceTypes={self.serviceTypes}.")
+		# print(f"[PlutoTV] DEBUG: addSamsung={self.addSamsung}.")
+		# print(f"[PlutoTV] DEBUG: addXiaomi={self.addXiaomi}.")
 		# print(f"[PlutoTV] DEBUG: self.liveMode='{self.liveMode}'.")
 		# print(f"[PlutoTV] DEBUG: self.channelNumbering='{self.channelNumbering}'.")
 		# print(f"[PlutoTV] DEBUG: self.piconMode='{self.piconMode}'.")
 		try:
-			epgCache = eEPGCache.getInstance()
-			serviceNumbers = {"lastNumber": 0}
-			serviceNumbersModified = False
-			if isfile(PLUTO_SERVICE_NUMBER_PATH):
-				print("[PlutoTV] Reading service numbers.")
-				try:
-					with open(PLUTO_SERVICE_NUMBER_PATH, "rb") as fd:
-						serviceNumbers = load(fd)
-				except OSError as err:
-					print(f"[PlutoTV] Error {err.errno}: Unable to load service numbers '{PLUTO_SERVICE_NUMBER_PATH}'!  ({err.strerror})")
-			for region in bouquetRegionList:
-				if self.abort:
-					break
-				print(f"[PlutoTV] Fetching {PLUTO_DATA[region][PLUTO_COUNTRY_NAME]} carousel data.")
-				progress = 0
-				self.uiUpdate(action=_("Pluto TV Update - %s") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], progress=progress, status=_("Fetching %s carousel data.") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], pause=0.5)
-				param = {
-					"deviceId": DEVICEID1_HEX,
-					"sid": SID1_HEX
-				}
-				header = buildHeader(PLUTO_DATA[region][PLUTO_IP])
-				channels = sorted(fetchURL(PLUTO_LINEUP_URL, header=header, param=param), key=lambda x: x["number"])
-				# channelsDump(region, channels)
-				channelCount = len(channels)
+			plutoBandwidth.reset()
+			with self.timings.span("state load"):
+				self.loadJournal(bouquetRegionList)
+				self.loadServiceNumbers()
+				self.loadChannelCache()
+				self.loadPiconManifest()
+				self.loadGuideHorizon()
+				self.loadGuideFingerprints()
+			regionServices = {}  # Region: {Channel identifier: Service reference}.
+			regionChanges = {}  # Region: True if the bouquet changed.
+			installRegions = []
+			bouquetsChanged = False
+			for region in self.regionQueue(bouquetRegionList):  # Build the bouquets of all regions first.
 				if self.abort:
 					break
-				print("[PlutoTV] Building category and channel lists.")
-				progress += 1
-				self.uiUpdate(progress=progress, status=_("Building category and channel lists."), pause=0.5)
-				for channel in channels:
-					# identifier = channel.get("_id", "")
-					# slug = channel.get("slug", "")
-					# name = channel.get("name", "")
-					# hash = channel.get("hash", "")
-					# number = channel.get("number", 0)
-					# summary = channel.get("summary", "")
-					# visibility = channel.get("visibility", "")
-					# onDemandDescription = channel.get("onDemandDescription", "")
-					# category = channel.get("category", "")
-					# plutoOfficeOnly = channel.get("plutoOfficeOnly", False)
-					# directOnly = channel.get("directOnly", False)
-					# chatRoomId = channel.get("chatRoomId", -1)
-					# cohortMask = channel.get("cohortMask", 0)
-					# featuredImage = channel.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# thumbnail = channel.get("thumbnail", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# tile = channel.get("tile", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# logo = channel.get("logo", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# colorLogoSVG = channel.get("colorLogoSVG", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# colorLogoPNG = channel.get("colorLogoPNG", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# solidLogoSVG = channel.get("solidLogoSVG", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# solidLogoPNG = channel.get("solidLogoPNG", {})  # Typically key "path" as a URL to a background or screen shot image.
-					# featured = channel.get("featured", False)
-					# featuredOrder = channel.get("featuredOrder", 0)
-					# favorite = channel.get("favorite", False)
-					# isStitched = channel.get("isStitched", False)
-					# stitched = channel.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
-					# tmsid = channel.get("tmsid", "")
-					if self.abort:
-						break
-					category = channel.get("category", "")
-					if (category == "Samsung" and not addSamsung) or (category == "Xiaomi TV" and not addXiaomi):
-						continue
-					urls = channel.get("stitched", {}).get("urls")
-					if not isinstance(urls, list) or len(urls) == 0:
-						print("[PlutoTV] Categories without URLs are not being added.")
-						continue
-					identifier = channel["_id"]
-					match self.liveMode:
-						case "original":
-							url = [updateQuery(x["url"], {
-								"deviceType": "web",
-								"deviceMake": "Chrome",
-								"deviceModel": "web",
-								"appName": "web",
-								"deviceId": "bc83a564-4b91-11ef-8a44-83c5e90e038f"
-							}) for x in urls if x["type"].lower() == "hls"][0]
-						case "roku":
-							url = "&".join((
-								f"https://stitcher-ipv4.pluto.tv/v1/stitch/embed/hls/channel/{identifier}/master.m3u8?deviceId=PSID",
-								"deviceModel=web",
-								"deviceVersion=1.0",
-								"appVersion=1.0",
-								"deviceType=rokuChannel",
-								"deviceMake=rokuChannel",
-								"deviceDNT=1"
-							))
-						case "samsung":
-							url = "&".join((
-								f"https://stitcher-ipv4.pluto.tv/v1/stitch/embed/hls/channel/{identifier}/master.m3u8?deviceType=samsung-tvplus",
-								"deviceMake=samsung",
-								"deviceModel=samsung",
-								"deviceVersion=unknown",
-								"appVersion=unknown",
-								"deviceLat=0",
-								"deviceLon=0",
-								"deviceDNT=%7BTARGETOPT%7D",
-								"deviceId=%7BPSID%7D",
-								"advertisingId=%7BPSID%7D",
-								"us_privacy=1YNY",
-								"samsung_app_domain=%7BAPP_DOMAIN%7D",
-								"samsung_app_name=%7BAPP_NAME%7D",
-								"profileLimit=",
-								"profileFloor=",
-								"embedPartner=samsung-tvplus"
-							))
-					if category not in channelList.keys():
-						categories.append(category)
-						channelList[category] = []
-					name = channel["name"]
-					if self.channelNumbering == "original":
-						match category:
-							case "Samsung":
-								number = identifier[-4:].upper().lstrip("0")
-							case "Xiaomi TV":
-								number = identifier[-4:].upper().lstrip("0")
-							case _:
-								number = channel.get("number", 0)
-								if number:
-									number = f"{int(number):X}"
-								else:
-									number = assignNumber()
-									if number is None:
-										result = self.EXIT_ERROR
-										break
-					else:
-						number = assignNumber()
-						if number is None:
-							result = self.EXIT_ERROR
-							break
-					piconURL = channel.get("colorLogoPNG", {}).get("path", None)
-					channelList[category].append((number, identifier, name, piconURL, url))
+				if region not in self.serviceTypes:  # The region was removed from the settings after the update was requested.
+					print(f"[PlutoTV] Region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' is no longer a bouquet region, it is skipped.")
+					continue
+				serviceReferences, bouquetChanged, bouquetInstall = self.updateBouquet(region)
+				if serviceReferences:
+					regionServices[region] = serviceReferences
+					regionChanges[region] = bouquetChanged
+				if bouquetChanged:
+					bouquetsChanged = True
+				if bouquetInstall:
+					installRegions.append(region)
+			with self.timings.span("state save"):
+				self.saveChannelCache()
+				self.savePiconManifest()
+			if bouquetsChanged or installRegions:  # Bouquets already written must be loaded even if the update is aborted.
+				with self.timings.span("reload"):
+					self.commitBouquets(installRegions)
+				for stages in self.journal["regions"].values():  # The bouquets written so far are now loaded.
+					if "bouquet" in stages:
+						stages["bouquet"] = {"changed": False}
+				self.saveJournal()
+			else:
+				print("[PlutoTV] All bouquets are unchanged, service list reload skipped.")
+			self.guideTransformer = PlutoGuideTransformer(_("Rating"), _("Season, episode"))
+			plutoEPGCommitter.reset()
+			guideRegions = {}
+			for region, serviceReferences in regionServices.items():  # The EPG can only be imported once the service references are valid.
+				if self.stageResult(region, "epg"):
+					print(f"[PlutoTV] EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' was already imported by the interrupted update.")
+				else:
+					guideRegions[region] = serviceReferences
+			for region, serviceReferences in guideRegions.items():  # Make the now/next EPG of all regions available first.
 				if self.abort:
 					break
-				if categories:
-					print(f"[PlutoTV] Building bouquet '{region}' for '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
-					progress += 1
-					self.uiUpdate(progress=progress, status=_("Building bouquet '%s' for '%s'.") % (region, PLUTO_DATA[region][PLUTO_COUNTRY_NAME]))
-					bouquet = f"userbouquet.pluto_tv_{region.lower()}.tv"
-					serviceReferences = {}
-					bouquetData = []
-					bouquetData.append(f"#NAME Pluto TV {region} (TV)")
-					serviceType = serviceTypes[region]
-					increment = 48.0 / channelCount  # This part of the processing constitutes 49% of the total progress.
-					for counter, category in enumerate(categories):
-						if self.abort:
-							break
-						bouquetData.append(f"#SERVICE 1:64:{counter}:0:0:0:0:0:0:0::{category}")
-						if config.plugins.PlutoTV.addDescriptions.value:
-							bouquetData.append(f"#DESCRIPTION {category}")
-						for channel in channelList[category]:
-							if self.abort:
-								break
-							number = channel[self.CHANNEL_NUMBER]
-							name = channel[self.CHANNEL_NAME]
-							progress += increment
-							self.uiUpdate(progress=round(progress), status=_("Downloading '%s' picon.") % name, pause=0.1)
-							tids = PLUTO_DATA[region][PLUTO_TIDS]
-							bouquetData.append(f"#SERVICE {serviceType}:0:1:{number}:{tids}:0:0:0:0:0:{channel[self.CHANNEL_SERVICE_URL].replace(":", "%3A")}:{name.replace(":", "%3A")}")
-							if config.plugins.PlutoTV.addDescriptions.value:
-								bouquetData.append(f"#DESCRIPTION {name}")
-							serviceReference = f"{serviceType}:0:1:{number}:{tids}:0:0:0:0:0"
-							serviceReferences[channel[self.CHANNEL_IDENTIFIER]] = f"{serviceReference}:0"
-							piconURL = f"{channel[self.CHANNEL_PICON_URL]}?w=220&h=132"  # Fetch the FHD resolution image.
-							match self.piconMode:
-								case "srp":
-									piconBaseName = serviceReference.replace(":", "_")
-								case "name":
-									piconBaseName = str(name).replace("/", "_")
-								case "snp":
-									piconBaseName = normalize("NFKD", name).encode("ASCII", "ignore").decode()
-									piconBaseName = sub(r"[^a-z0-9]", "", piconBaseName.replace("&", "and").replace("+", "plus").replace("*", "star").lower())
-							piconPath = join(config.plugins.PlutoTV.piconPath.value, f"{piconBaseName}.png")
-							# print(f"[PlutoTV] DEBUG: piconURL={piconURL}, piconBaseName={piconBaseName}, piconPath={piconPath}.")
-							if "missing.png" in piconURL or "MISSING" in piconURL:
-								# print("[PlutoTV] DEBUG: Don't try fetching the 'missing.png' or 'MISSING' picon!")
-								copy2(resolveFilename(SCOPE_PLUGIN_ABSOLUTE, "images/pluto_picon.png"), piconPath)
-							elif not isfile(piconPath) or config.plugins.PlutoTV.forcePiconDownload.value:
-								# print(f"[PlutoTV] DEBUG: Fetching '{piconURL}' as picon '{piconPath}'.")
-								try:
-									response = get(piconURL, timeout=30)
-									response.raise_for_status()
-									with open(piconPath, 'wb') as fd:
-										fd.write(response.content)
-								except Exception as err:
-									print(f"[PlutoTV] Error: Unable to download picon '{piconURL}' as '{piconPath}'!  ({err})")
-									copy2(resolveFilename(SCOPE_PLUGIN_ABSOLUTE, "images/pluto_picon.png"), piconPath)
-							# else:
-							# 	print(f"[PlutoTV] DEBUG: Not fetching '{piconURL}' as picon '{piconPath}' already exists.")
-					progress = round(progress)  # Eliminate any rounding errors and return progress back to an integer.
-					if not self.abort:
-						bouquetData.append("")
-						fileWriteLines(resolveFilename(SCOPE_CONFIG, bouquet), bouquetData, source=MODULE_NAME)
-					print(f"[PlutoTV] Fetching EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
-					self.uiUpdate(status=_("Fetching EPG data."), pause=0.5)
-					startTime = gmtime()
-					param = {
-						"start": strftime("%Y-%m-%dT%H:00:00Z", startTime),
-						"stop": strftime("%Y-%m-%dT%H:00:00Z", gmtime(timegm(startTime) + 86400)),  # UTC startTime + 24 Hours.
-						"deviceId": DEVICEID1_HEX,
-						"sid": SID1_HEX,
-					}
-					header = buildHeader(PLUTO_DATA[region][PLUTO_IP])
-					# Does the list of guides data need to be sorted?
-					guides = sorted(fetchURL(PLUTO_GUIDE_URL, header=header, param=param), key=lambda x: x["number"])
-					# guidesDump(region, guides)
-					guidesCount = len(guides)
-					if self.abort:
-						break
-					# Why do we need to filter the guides?  Don't all entries have an identifier?
-					for counter, guide in enumerate(filter(lambda x: x.get("_id"), guides)):
-						# identifier = guide.get("_id", "")
-						# slug = guide.get("slug", "")
-						# name = guide.get("name", "")
-						# hash = guide.get("hash", "")
-						# number = guide.get("number", 0)
-						# summary = guide.get("summary", "")
-						# visibility = guide.get("visibility", "")
-						# onDemandDescription = guide.get("onDemandDescription", "")
-						# category = guide.get("category", "")
-						# plutoOfficeOnly = guide.get("plutoOfficeOnly", False)
-						# directOnly = guide.get("directOnly", False)
-						# chatRoomId = guide.get("chatRoomId", -1)
-						# onDemand = guide.get("onDemand", False)
-						# cohortMask = guide.get("cohortMask", 0)
-						# featuredImage = guide.get("featuredImage", {})  # Typically key "path" as a URL to a background or screen shot image.
-						# thumbnail = guide.get("thumbnail", {})  # Typically key "path" as a URL to a background or promotional image.
-						# tile = guide.get("tile", {})  # Typically key "path" as a URL to a background or promotional image.
-						# tileGrayScale = guide.get("tileGrayScale", {})  # Typically key "path" as a URL to a background or promotional image.
-						# logo = guide.get("logo", {})  # Typically key "path" as a URL to a background or promotional image.
-						# colorLogoSVG = guide.get("colorLogoSVG", {})  # Typically key "path" as a URL to a background or promotional image.
-						# colorLogoPNG = guide.get("colorLogoPNG", {})  # Typically key "path" as a URL to a background or promotional image.
-						# solidLogoSVG = guide.get("solidLogoSVG", {})  # Typically key "path" as a URL to a background or promotional image.
-						# solidLogoPNG = guide.get("solidLogoPNG", {})  # Typically key "path" as a URL to a background or promotional image.
-						# featured = guide.get("featured", False)
-						# featuredOrder = guide.get("featuredOrder", -1)
-						# favorite = guide.get("favorite", False)
-						# isStitched = guide.get("isStitched", False)
-						# stitched = guide.get("stitched", {})  # Typically keys "urls" and "sessionURL" with "urls" a list of dictionaries with keys "type" and "url".
-						# timelines = guide.get("timelines", [{}])
-						if self.abort:
-							break
-						identifier = guide.get("_id")
-						name = guide.get("name", _("* Unknown *"))
-						self.uiUpdate(progress=counter * 50 // guidesCount + 50, status=_("Processing '%s' guides.") % name, pause=0.1)
-						genres = set()
-						guideList[identifier] = []
-						timelines = guide.get("timelines", [])
-						# print(f"[PlutoTV] DEBUG: timelines={len(timelines)}.")
-						for timeline in timelines:
-							# identifier = timeline.get("_id", "")
-							# start = timeline.get("start", "")
-							# stop = timeline.get("stop", "")
-							# title = timeline.get("title", "")
-							# episode = timeline.get("episode", {})
-							#
-							# Episode data:
-							# identifier = episode.get("_id", "")
-							# number = episode.get("number", 0)
-							# season = episode.get("season", 0)
-							# description = episode.get("description", "")
-							# duration = episode.get("duration", 0)
-							# originalContentDuration = episode.get("originalContentDuration", 0)
-							# genre = episode.get("genre", "")
-							# subGenre = episode.get("subGenre", "")
-							# distributeAs = episode.get("distributeAs", {})  # Typical key is AVOD which is a Boolean.
-							# clip = episode.get("clip", {})  # Typically keys "actors"[], "writers"[], "directors"[], producers"[] and "originalReleaseDate".
-							# rating = episode.get("rating", "")
-							# name = episode.get("name", "")
-							# slug = episode.get("slug", "")
-							# poster = episode.get("poster", {})  # Typically key "path" as a URL to a background or promotional image.
-							# firstAired = episode.get("firstAired", "")
-							# thumbnail = episode.get("thumbnail", {})  # Typically key "path" as a URL to a background or promotional image.
-							# liveBroadcast = episode.get("liveBroadcast", False)
-							# featuredImage = episode.get("featuredImage", {})  # Typically key "path" as a URL to a background or promotional image.
-							# series = episode.get("series", {})
-							# ratingDescriptors = episode.get("ratingDescriptors", "")
-							# poster16_9 = episode.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
-							# cc = episode.get("cc", False)
-							#
-							# Series data:
-							# identifier = series.get("_id", "")
-							# name = series.get("name", "")
-							# slug = series.get("slug", "")
-							# type = series.get("type", "")
-							# tile = series.get("tile", {})  # Typically key "path" as a URL to a background or promotional image.
-							# description = series.get("description", "")
-							# summary = series.get("summary", "")
-							# displayName = series.get("displayName", "")
-							# featuredImage = series.get("featuredImage", {})  # Typically key "path" as a URL to a background or promotional image.
-							# poster16_9 = series.get("poster16_9", {})  # Typically key "path" as a URL to a background or promotional image.
-							if self.abort:
-								break
-							episode = timeline.get("episode", {}) or timeline
-							series = episode.get("series", {}) or timeline
-							duration = int(episode.get("duration", "0") or "0") // 1000  # In seconds.
-							start = timegm(strptime(timeline["start"], "%Y-%m-%dT%H:%M:%S.%fZ"))
-							title = series.get("name", "") or episode.get("name", "") or timeline.get("title", "")
-							tvPlot = series.get("description", "") or series.get("summary", "") or guide.get("description", "") or guide.get("summary", "")
-							episodeSeason = episode.get("season", 0)
-							episodeNumber = episode.get("number", 0)
-							episodeType = series.get("type", "n/a")
-							episodeName = episode["name"]
-							episodeRating = episode.get("rating", "")
-							episodeGenre = episode.get("subGenre", "")
-							episodePlot = episode.get("description", "") or tvPlot or episodeName
-							if len(episodeRating) > 0 and "Not Rated" not in episodeRating:
-								episodePlot = f"{episodePlot}\n{_("Rating")}: {f"FSK-{episodeRating}" if episodeRating.isdigit() else episodeRating}"
-							if episodeType == "tv" and (episodeSeason > 0 and episodeNumber >= 0):
-								episodePlot = f"{episodeName}\n{episodeSeason}. {_("Season, episode")} {episodeNumber}: {episodePlot}"
-							elif episodeType == "film" and episodeGenre not in ("None", ""):
-								episodePlot = f"{episodeGenre}\n{episodePlot}"
-							genre = episode.get("genre", "")
-							if any((genre in ("Classics", "Romance", "Thrillers", "Horror"), "Sci-Fi" in genre, "Action" in genre)):
-								genre = 0x10
-							elif "News" in genre or "Educational" in genre:
-								genre = 0x20
-							elif genre == "Comedy":
-								genre = 0x30
-							elif "Children" in genre:
-								genre = 0x50
-							elif genre == "Music":
-								genre = 0x60
-							elif genre == "Documentaries":
-								genre = 0xA0
-							else:
-								genre = 0
-							if genre not in genres:
-								genres.add(genre)
-								guideList[identifier].append([])
-							# StartTime [long], Duration [int], EventTitle, ShortDescription, ExtendedDescription, EventType [byte], EventID [int], ParentalRatings [list of tuples (Country [3 letter string], ParentalRating [byte])]
-							guideList[identifier][-1].append((start, duration, title, "", episodePlot, genre))
-					self.uiUpdate(progress=99)
+				self.updateGuide(region, serviceReferences, nowNext=True)
+			self.guideWorker = "backfill"
+			plutoWorkers.changePriority("update", self.guideWorker)  # The full EPG window is filled in at the lowest priority.
+			try:
+				for region, serviceReferences in guideRegions.items():
 					if self.abort:
 						break
-					dvbDB = eDVBDB.getInstance()
-					bouquets = fileReadLines("/etc/enigma2/bouquets.tv", [], source=MODULE_NAME)
-					if bouquet not in bouquets:
-						print(f"[PlutoTV] Install bouquet for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
-						bouquetRootString = "1:7:1:0:0:0:0:0:0:0:FROM BOUQUET \"bouquets.tv\" ORDER BY bouquet" if config.usage.multibouquet.value else f"{self.TV_SERVICE_TYPES} FROM BOUQUET \"userbouquet.favourites.tv\" ORDER BY bouquet"
-						bouquetRoot = eServiceReference(bouquetRootString)
-						serviceHandler = eServiceCenter.getInstance()
-						mutableBouquetList = serviceHandler.list(bouquetRoot).startEdit()
-						if mutableBouquetList:
-							newBouquetReference = eServiceReference(f"1:7:1:0:0:0:0:0:0:0:FROM BOUQUET \"{bouquet}\" ORDER BY bouquet")
-							if not mutableBouquetList.addService(newBouquetReference):
-								mutableBouquetList.flushChanges()
-								dvbDB.reloadBouquets()
-								mutableBouquet = serviceHandler.list(newBouquetReference).startEdit()
-								if mutableBouquet:
-									mutableBouquet.setListName(f"Pluto TV {region} (TV)")
-									mutableBouquet.flushChanges()
-								else:
-									print("[PlutoTV] Error: Get mutable list for newly created bouquet failed!")
-					dvbDB.reloadServicelist()
-					dvbDB.reloadBouquets()
-					print(f"[PlutoTV] Merge EPG for region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
-					eventCount = 0
-					for identifier, serviceReference in serviceReferences.items():
-						for epgData in guideList.get(identifier, []):
-							eventCount += len(epgData)
-							epgCache.importEvents(serviceReference, epgData)
-					print(f"[PlutoTV] {eventCount} events merged, for {channelCount} channels.")
-					self.uiUpdate(progress=100)
-				else:
-					print(f"[PlutoTV] Pluto TV may not be available in '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}'.")
-					self.uiUpdate(status=_("Pluto TV may not be available in '%s'.") % PLUTO_DATA[region][PLUTO_COUNTRY_NAME], pause=10)
-					continue
-				categories.clear()
-				channelList.clear()
-				guideList.clear()
-			if not self.abort and serviceNumbersModified:
-				print("[PlutoTV] Saving service numbers.")
-				try:
-					with open(PLUTO_SERVICE_NUMBER_PATH, "wb") as fd:
-						dump(serviceNumbers, fd, protocol=5)
-						serviceNumbersModified = False
-				except OSError as err:
-					print(f"[PlutoTV] Error {err.errno}: Unable to save service numbers to '{PLUTO_SERVICE_NUMBER_PATH}'!  ({err.strerror})")
-			serviceNumbers.clear()
+					self.updateGuide(region, serviceReferences)
+			finally:
+				plutoWorkers.changePriority(self.guideWorker, "update")
+				self.guideWorker = "update"
+			print(f"[PlutoTV] EPG commit took {plutoEPGCommitter.commitTime:.2f} seconds in {plutoEPGCommitter.slices} slice(s), with {plutoEPGCommitter.pauseTime:.2f} seconds of pauses.")
+			self.saveGuideFingerprints()
+			downloaded, throttled, throttledTime = plutoBandwidth.downloaded // 1024, plutoBandwidth.throttledBytes // 1024, plutoBandwidth.throttledTime
+			print(f"[PlutoTV] Downloaded {downloaded} KB, bandwidth shaping delayed {throttled} KB by {throttledTime:.1f} seconds.")
+			self.summary = _("%d KB downloaded, %d KB throttled.") % (downloaded, throttled)
+			slowest = self.timings.save(PLUTO_UPDATE_TIMING, "Pluto TV update")
+			if slowest:
+				self.summary = f"{self.summary}  {_("Slowest: %s.") % slowest}"
+			if not self.abort:
+				self.saveServiceNumbers()
+				if self.result == self.EXIT_DONE:
+					self.clearJournal()
+					self.removeLastGood(self.configuredServiceTypes())
+				plutoScheduler.planRegions({x: (y, min(self.guideHorizon.get(x, {}).values(), default=0)) for x, y in regionChanges.items() if x not in self.degraded})  # Regions that fell back to the last good data stay due for the retry.
+			self.serviceNumbers.clear()
+			self.guideTransformer = None
 			fileWriteLine(PLUTO_TIMER_PATH, f"{int(time())}\n", source=MODULE_NAME)
 		except Exception as err:
-			print(f"[PlutoTV] Error: Update of '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' has failed and been aborted!  ({err})\n{format_exc()}")
-			result = self.EXIT_ERROR
-		if not self.verbose:
-			self.start()  # This is a background update, reset the timer for the next run.
+			print(f"[PlutoTV] Error: Update of '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME] if region else _("Pluto TV")}' has failed and been aborted!  ({err})\n{format_exc()}")
+			self.result = self.EXIT_ERROR
 		self.updateActive = False
 		print("[PlutoTV] Carousel update finished.")
-		if self.abort:
-			result = self.EXIT_ABORT
-		return result
+		return self.EXIT_ABORT if self.abort else self.result
+
+
+def loadRegions():  # Load the supported regions and create the settings that use them, this is deferred from plugin import to first use.
+	global regionsLoaded
+	if regionsLoaded:
+		return
+	regionsLoaded = True
+	domData = fileReadXML(resolveFilename(SCOPE_PLUGIN_ABSOLUTE, "plutotv.xml"), default=None, source=MODULE_NAME)
+	choices = []
+	if domData is not None:
+		for region in domData.findall("region"):
+			country = region.get("country")
+			name = international.getCountryTranslated(country) if international else region.get("country")
+			ip = region.get("ip")
+			tids = region.get("tids")
+			if country and name and ip and tids:
+				PLUTO_DATA[country] = (name, ip, tids)
+				choices.append((country, name))
+		choices.sort(key=lambda x: x[1])
+		print(f"[PlutoTV] Data for {len(PLUTO_DATA)} regions loaded.")
+	else:
+		print("[PlutoTV] Error: No region data loaded!")
+	choices.insert(0, ("AUTO", _("* Automatic *")))
+	config.plugins.PlutoTV.region = ConfigSelection(default="AUTO", choices=choices)  # Settings created late still get their saved values.
+	config.plugins.PlutoTV.bouquetRegion = ConfigSubList()
+	config.plugins.PlutoTV.bouquetService = ConfigSubList()
+	for count in range(config.plugins.PlutoTV.bouquetCount.value):
+		config.plugins.PlutoTV.bouquetRegion.append(ConfigSelection(default="AUTO", choices=choices))
+		config.plugins.PlutoTV.bouquetService.append(ConfigSelection(default="4097", choices=PLUTO_SERVICE_CHOICES))
+
+
+@cache
+def sessionIdentifier():
+	from uuid import uuid4  # The uuid module is only imported when Pluto TV is first used.
+	return str(uuid4().hex)
+
+
+@cache
+def deviceIdentifier():
+	from uuid import uuid1
+	return str(uuid1().hex)
 
 
 def updateQuery(url, queryData, safe="", quote_via=quote_plus):
@@ -1796,17 +2911,75 @@ def buildHeader(ipAddress):
 	return header
 
 
-def fetchURL(url, param={}, header=PLUTO_USER_AGENT):
+def bouquetFingerprint(bouquetData):
+	while bouquetData and not bouquetData[-1]:  # Trailing blank lines are not significant.
+		bouquetData = bouquetData[:-1]
+	return sha1("\n".join(bouquetData).encode("UTF-8", "ignore")).hexdigest()
+
+
+def retryAfter(value):  # Return the seconds given by a Retry-After header, None if there is no usable value.
+	if value:
+		try:
+			delay = float(value)
+		except ValueError:
+			try:
+				delay = parsedate_to_datetime(value).timestamp() - time()
+			except (TypeError, ValueError):
+				return None
+		return min(max(delay, 1.0), PLUTO_BREAKER_LIMIT)
+	return None
+
+
+def limitedGet(url, params=None, **kwargs):  # All requests to Pluto TV go through the rate limiter.
+	from requests import get  # Importing requests is slow so it is left until the first request.
+	host = urlparse(url).hostname
+	plutoRateLimiter.acquire(host)
+	response = get(url, params, **kwargs)
+	delay = plutoRateLimiter.record(host, response)
+	if response.status_code == 429:
+		response.close()
+		raise PlutoThrottled(host, delay or 0)
+	return response
+
+
+def fetchURL(url, param={}, header=PLUTO_USER_AGENT, deadline=None, shaped=False):
 	try:
-		response = get(url, param, headers=header)
+		response = limitedGet(url, param, headers=header, timeout=deadline.timeout() if deadline else PLUTO_TIMEOUT)
 		response.raise_for_status()
+		if shaped:
+			plutoBandwidth.consume(len(response.content))
 		result = response.json()
+	except PlutoThrottled as err:
+		print(f"[PlutoTV] fetchURL Error: {err}!")
+		result = {}
 	except Exception as err:
 		print(f"[PlutoTV] fetchURL Error: {err}!\n{format_exc()}")
 		result = {}
 	return result
 
 
+def fetchFile(url, path, param={}, header=PLUTO_USER_AGENT, deadline=None, shaped=False):  # Stream a response to a file rather than holding it in memory.
+	try:
+		with limitedGet(url, param, headers=header, stream=True, timeout=deadline.timeout() if deadline else PLUTO_TIMEOUT) as response:
+			response.raise_for_status()
+			with open(f"{path}.tmp", "wb") as fd:
+				for chunk in response.iter_content(chunk_size=65536):
+					if deadline and deadline.expired():
+						raise TimeoutError("Download abandoned as the update was aborted or ran out of time")
+					if shaped:
+						plutoBandwidth.consume(len(chunk))  # Not reading holds back the sender.
+					fd.write(chunk)
+		replace(f"{path}.tmp", path)
+		result = True
+	except PlutoThrottled as err:
+		print(f"[PlutoTV] fetchFile Error: {err}!")
+		result = False
+	except Exception as err:
+		print(f"[PlutoTV] fetchFile Error: {err}!\n{format_exc()}")
+		result = False
+	return result
+
+
 # The following dump methods, and their support methods, are only needed for debugging and should be commented out for production.
 #
 """
@@ -2142,7 +3315,7 @@ def setResumePoint(session, sid=None):
 				saveResumePoints(sid)
 
 
-class PlutoUpdate(Screen, PlutoUpdater):
+class PlutoUpdate(Screen):
 	# skin = """
 	# <screen name="PlutoUpdate" title="Pluto TV Update" position="center,50" size="600,105" ignoreWidgets="action" resolution="1280,720">
 	# 	<widget name="progress" position="0,4" size="e-70,12" backgroundColor="#00333333" borderColor="#0000C000" borderWidth="1" foregroundColor="#0000C000" />
@@ -2166,7 +3339,6 @@ class PlutoUpdate(Screen, PlutoUpdater):
 
 	def __init__(self, session, bouquetRegionList=None):
 		Screen.__init__(self, session, enableHelp=True)
-		PlutoUpdater.__init__(self, True)  # Verbose output is True.
 		self.bouquetRegionList = bouquetRegionList
 		self["action"] = Label(_("Pluto TV Update"))
 		self["progress"] = ProgressBar()
@@ -2180,6 +3352,17 @@ class PlutoUpdate(Screen, PlutoUpdater):
 		self.timer = eTimer()
 		self.timer.callback.append(self.close)
 		self.onLayoutFinish.append(self.startUpdate)
+		self.onClose.append(self.stopUpdate)
+
+	def updateProgress(self, action, progress, status):
+		if action is not None:
+			self.setTitle(action)
+			self["action"].setText(action)
+		if progress is not None:
+			self["progress"].setValue(progress)
+			self["percentage"].setText(f"{progress}%")
+		if status is not None:
+			self["status"].setText(status)
 
 	def startUpdate(self):
 		def getResult(result):
@@ -2189,7 +3372,7 @@ class PlutoUpdate(Screen, PlutoUpdater):
 				case PlutoUpdater.EXIT_DONE:
 					self.setTitle(_("Pluto TV"))
 					self["action"].setText(_("Pluto TV Update"))
-					self["status"].setText(_("Update finished."))
+					self["status"].setText(f"{_("Update finished.")}  {plutoUpdateCoordinator.summary}")
 					delay = 5
 				case PlutoUpdater.EXIT_RUNNING:
 					self.setTitle(_("Pluto TV"))
@@ -2207,26 +3390,228 @@ class PlutoUpdate(Screen, PlutoUpdater):
 			if delay:
 				self.timer.startLongTimer(delay)
 
-		thread = threads.deferToThread(self.updateThread)
-		thread.addCallback(getResult)
+		plutoUpdateCoordinator.attach(self.updateProgress)  # Show the progress of an update that is already running.
+		plutoUpdateCoordinator.request(self.bouquetRegionList).addCallback(getResult)
+
+	def stopUpdate(self):
+		plutoUpdateCoordinator.detach(self.updateProgress)
 
 	def keyCancel(self):
-		self.abort = True
+		plutoUpdateCoordinator.cancel()
+
 
+class PlutoUpdateCoordinator(PlutoUpdater):  # Run one update at a time for the whole process, merging later requests into it.
+	def __init__(self):
+		PlutoUpdater.__init__(self)
+		self.requestLock = Lock()
+		self.jobRegions = None  # The regions of the running update, None when idle.
+		self.jobOpen = False  # Regions can be added to the running update until all its bouquets are built.
+		self.jobWaiters = []
+		self.jobScheduled = False
+		self.jobServiceTypes = {}  # The service types of the bouquet regions when the running update started.
+		self.nextRegions = []  # Regions requested too late to join the running update.
+		self.nextWaiters = []
+		self.nextScheduled = False
+		self.retries = 0  # Consecutive updates that had to fall back to the last good data.
+
+	def request(self, regions=None, scheduled=False):  # This must be called from the reactor thread and returns a Deferred for the exit code.
+		loadRegions()
+		regions = regions or [x.value for x in config.plugins.PlutoTV.bouquetRegion]
+		deferred = defer.Deferred()
+		with self.requestLock:
+			if self.jobRegions is None:
+				self.jobRegions = list(regions)
+				self.jobOpen = True
+				self.jobWaiters = [deferred]
+				self.jobScheduled = scheduled
+				self.jobServiceTypes = self.configuredServiceTypes()
+				self.abort = False
+				self.uiState = [_("Pluto TV Update"), 0, _("Please wait...")]
+				plutoWorkers.callInWorker("update", self.runJobs)
+			elif (self.jobOpen or all(x in self.jobRegions for x in regions)) and self.canJoin(regions):
+				print("[PlutoTV] Joining the update already in progress.")
+				self.jobRegions.extend(x for x in regions if x not in self.jobRegions)
+				self.jobWaiters.append(deferred)
+				self.jobScheduled = self.jobScheduled or scheduled
+			else:
+				print("[PlutoTV] Queuing an update to follow the update already in progress.")
+				self.nextRegions.extend(x for x in regions if x not in self.nextRegions)
+				self.nextWaiters.append(deferred)
+				self.nextScheduled = self.nextScheduled or scheduled
+		return deferred
+
+	def canJoin(self, regions):  # Regions added or changed in the settings since the running update started must wait for the next update.
+		serviceTypes = self.configuredServiceTypes()
+		return all(x in self.jobServiceTypes and serviceTypes.get(x) == self.jobServiceTypes[x] for x in regions)
+
+	def updateServiceTypes(self):
+		with self.requestLock:
+			return self.configuredServiceTypes() if self.jobRegions is None else dict(self.jobServiceTypes)
+
+	def cancel(self):
+		with self.requestLock:
+			if self.jobRegions is not None:
+				self.abort = True
+				guideProcess = self.guideProcess
+				if guideProcess:
+					guideProcess.kill()  # Do not wait for the update to notice the abort.
+
+	def retryDelay(self):  # Return the seconds until the update should be retried, None to wait for the normal update interval.
+		delay = ceil(plutoRateLimiter.retryDelay(PLUTO_API_URL))  # Pluto TV must be accepting requests again.
+		if self.degraded and not self.abort:
+			self.retries += 1
+			delay = max(delay, PLUTO_RETRY_DELAYS[min(self.retries, len(PLUTO_RETRY_DELAYS)) - 1])
+			print(f"[PlutoTV] Pluto TV data for {", ".join(PLUTO_DATA[x][PLUTO_COUNTRY_NAME] for x in sorted(self.degraded))} could not be fetched, retry {self.retries} in {delay} seconds.")
+		else:
+			self.retries = 0
+		repeat = config.plugins.PlutoTV.updateTimer.value * 3600
+		return delay if delay and (not repeat or delay < repeat) else None
 
-class PlutoScheduler(PlutoUpdater):
+	def regionQueue(self, bouquetRegionList):  # The list grows while requests are merged into the running update.
+		index = 0
+		try:
+			while True:
+				with self.requestLock:
+					if index >= len(bouquetRegionList):
+						break
+					region = bouquetRegionList[index]
+				index += 1
+				yield region
+		finally:
+			with self.requestLock:
+				self.jobOpen = False
+
+	def runJobs(self):  # This runs in the update worker.
+		while True:
+			self.bouquetRegionList = self.jobRegions
+			result = self.updateThread()
+			with self.requestLock:
+				waiters = self.jobWaiters
+				scheduled = self.jobScheduled
+				if self.nextWaiters and not self.abort:
+					self.jobRegions, self.jobWaiters, self.jobScheduled = self.nextRegions, self.nextWaiters, self.nextScheduled
+					self.jobServiceTypes = self.configuredServiceTypes()
+					self.jobOpen = True
+					self.uiState = [_("Pluto TV Update"), 0, _("Please wait...")]
+				else:
+					waiters += self.nextWaiters  # An aborted update also cancels the update queued after it.
+					self.jobRegions = None
+					self.jobOpen = False
+					self.jobWaiters = []
+				self.nextRegions, self.nextWaiters, self.nextScheduled = [], [], False
+				idle = self.jobRegions is None
+			for deferred in waiters:
+				reactor.callFromThread(deferred.callback, result)
+			delay = self.retryDelay()
+			if scheduled or (delay and config.plugins.PlutoTV.updateTimer.value):  # Reset the timer for the next run, or for a retry.
+				reactor.callFromThread(plutoScheduler.start, delay)
+			if idle:
+				break
+
+
+class PlutoScheduler:
 	def __init__(self):
-		PlutoUpdater.__init__(self, False)  # Verbose output is False.
+		self.session = None
+		self.bootTime = monotonic()
+		self.lastKey = self.bootTime
+		self.dueSince = None  # Monotonic time an update became due while waiting for the user to be idle.
 		self.timer = eTimer()
 		self.timer.callback.append(self.startUpdate)
 
-	def start(self):
+	def attach(self, session):
+		self.session = session
+		self.bootTime = monotonic()
+		self.lastKey = self.bootTime
+		eActionMap.getInstance().bindAction("", -0x7FFFFFFF, self.keyPressed)  # See every key press before any screen.
+
+	def detach(self):
+		if self.session:
+			eActionMap.getInstance().unbindAction("", self.keyPressed)
+			self.session = None
+
+	def keyPressed(self, key, flag):
+		self.lastKey = monotonic()
+		return 0  # The key is not consumed.
+
+	def postponeDelay(self):  # Return the seconds a background update should be postponed, 0 to start it now.
+		now = monotonic()
+		settle = PLUTO_BOOT_SETTLE - (now - self.bootTime)
+		if settle > 0:
+			print("[PlutoTV] Update postponed until enigma2 has finished starting.")
+			return ceil(settle)
+		if self.session:
+			infoBar = InfoBar.instance
+			if self.session.nav.getRecordings() or (infoBar and hasattr(infoBar, "timeshiftEnabled") and infoBar.timeshiftEnabled()):
+				print("[PlutoTV] Update postponed while a recording or timeshift is active.")
+				return PLUTO_BUSY_POSTPONE
+			if not Standby.inStandby:
+				if self.dueSince is None:
+					self.dueSince = now
+				idle = now - self.lastKey
+				if idle < PLUTO_IDLE_TIME and now - self.dueSince < PLUTO_IDLE_WAIT:
+					print("[PlutoTV] Update postponed until the receiver is idle.")
+					return ceil(PLUTO_IDLE_TIME - idle)
+		return 0
+
+	def loadSchedule(self):  # Return {Region: {"due", "changeRate"}}.
+		path = join(PLUTO_FOLDER, PLUTO_SCHEDULE)
+		if isfile(path):
+			try:
+				with open(path, "rb") as fd:
+					return load(fd)
+			except Exception as err:
+				print(f"[PlutoTV] Error: Unable to load update schedule '{path}'!  ({err})")
+		return {}
+
+	def saveSchedule(self, schedule):
+		path = join(PLUTO_FOLDER, PLUTO_SCHEDULE)
+		try:
+			with open(f"{path}.tmp", "wb") as fd:
+				dump(schedule, fd, protocol=5)
+			replace(f"{path}.tmp", path)
+		except OSError as err:
+			print(f"[PlutoTV] Error {err.errno}: Unable to save update schedule '{path}'!  ({err.strerror})")
+
+	def planRegions(self, regionResults):  # This runs in the update worker, regionResults is {Region: (Bouquet changed, End of the imported EPG)}.
+		minimum = config.plugins.PlutoTV.updateTimer.value * 3600
+		maximum = max(config.plugins.PlutoTV.adaptiveTimer.value * 3600, minimum)
+		if not minimum or not maximum:
+			return
+		regions = [x.value for x in config.plugins.PlutoTV.bouquetRegion]
+		schedule = {x: y for x, y in self.loadSchedule().items() if x in regions}
+		now = int(time())
+		for region, (changed, horizon) in regionResults.items():
+			changeRate = schedule.get(region, {}).get("changeRate", 1.0) * (1.0 - PLUTO_SCHEDULE_WEIGHT) + (PLUTO_SCHEDULE_WEIGHT if changed else 0.0)
+			interval = maximum - (maximum - minimum) * changeRate  # Regions whose lineup rarely changes are updated less often.
+			interval *= uniform(1.0 - PLUTO_SCHEDULE_JITTER, 1.0 + PLUTO_SCHEDULE_JITTER)  # Stagger the regions.
+			if horizon:  # Update again before the imported EPG runs out, the jitter must not move the update past it.
+				interval = min(interval, horizon - now - PLUTO_SCHEDULE_MARGIN)
+			interval = int(min(max(interval, minimum), maximum))
+			schedule[region] = {"due": now + interval, "changeRate": changeRate}
+			print(f"[PlutoTV] Next update of region '{PLUTO_DATA[region][PLUTO_COUNTRY_NAME]}' in {interval // 3600}:{interval // 60 % 60:02d} with a lineup change rate of {changeRate:.0%}.")
+		self.saveSchedule(schedule)
+
+	def dueRegions(self):  # Return the seconds until the next region is due, None if there are no regions, and the regions due now.
+		loadRegions()
+		schedule = self.loadSchedule()
+		now = int(time())
+		due = {x.value: schedule.get(x.value, {}).get("due", 0) for x in config.plugins.PlutoTV.bouquetRegion}
+		if not due:
+			return None, []
+		return max(min(due.values()) - now, 1), [x for x, y in due.items() if y <= now + PLUTO_SCHEDULE_WINDOW]
+
+	def start(self, delay=None):
 		repeat = config.plugins.PlutoTV.updateTimer.value
-		last = int(fileReadLine(PLUTO_TIMER_PATH, default="0", source=MODULE_NAME))
-		delay = (repeat * 3600) - (int(time()) - last)
-		if delay <= 0 or delay > (repeat * 3600):
-			delay = 1
-		print(f"[PlutoTV] Next update in {delay // 3600}:{delay // 60 % 60:02d}:{delay % 60:02d} at {strftime("%Y-%b-%d %H:%M:%S", localtime(int(time()) + delay))}. Update will {f"be run every {repeat} hour(s)" if repeat else "not be rescheduled"}.")
+		settle = ceil(PLUTO_BOOT_SETTLE - (monotonic() - self.bootTime))
+		if delay is None and repeat and config.plugins.PlutoTV.adaptiveTimer.value:
+			delay = settle if settle > 0 else self.dueRegions()[0] or repeat * 3600  # The due regions are worked out once enigma2 has finished loading, without regions check again after the update interval.
+		elif delay is None:
+			last = int(fileReadLine(PLUTO_TIMER_PATH, default="0", source=MODULE_NAME))
+			delay = (repeat * 3600) - (int(time()) - last)
+			if delay <= 0 or delay > (repeat * 3600):
+				delay = 1
+		delay = max(delay, settle)  # Leave enigma2 to finish loading first.
+		print(f"[PlutoTV] Next update in {delay // 3600}:{delay // 60 % 60:02d}:{delay % 60:02d} at {strftime("%Y-%b-%d %H:%M:%S", localtime(int(time()) + delay))}. Update will {(f"be run every {repeat} to {max(repeat, config.plugins.PlutoTV.adaptiveTimer.value)} hour(s) for each region" if config.plugins.PlutoTV.adaptiveTimer.value else f"be run every {repeat} hour(s)") if repeat else "not be rescheduled"}.")
 		self.timer.startLongTimer(delay)
 
 	def stop(self):
@@ -2234,8 +3619,24 @@ class PlutoScheduler(PlutoUpdater):
 		print("[PlutoTV] Update process stopped.")
 
 	def startUpdate(self):
+		delay = ceil(plutoRateLimiter.retryDelay(PLUTO_API_URL))
+		if delay:  # Starting now would only fail and add to the load on Pluto TV.
+			print("[PlutoTV] Pluto TV is not accepting requests, update postponed.")
+			self.start(delay)
+			return
+		delay = self.postponeDelay()
+		if delay:  # Postponed runs are never skipped.
+			self.start(delay)
+			return
+		regions = None
+		if config.plugins.PlutoTV.updateTimer.value and config.plugins.PlutoTV.adaptiveTimer.value:
+			delay, regions = self.dueRegions()
+			if not regions:
+				self.start(delay)
+				return
 		print("[PlutoTV] Update process starting.")
-		reactor.callInThread(self.updateThread)
+		self.dueSince = None
+		plutoUpdateCoordinator.request(regions, scheduled=True)
 
 
 def runUpdate(session, **kwargs):
@@ -2275,9 +3676,17 @@ def autoStart(reason, session):
 		PLUTO_FOLDER = join(findStoragePath(500 * 10 ** 6, "/tmp", "/media/hdd", "/media/usb", "/media/cf", "/media/mmc"), "PlutoTV")
 		if not exists(PLUTO_FOLDER):
 			makedirs(PLUTO_FOLDER)
+		plutoEPGCommitter.attach(session)
+		plutoBandwidth.attach(session)
+		plutoScheduler.attach(session)
 		plutoScheduler.start()
 	else:  # Stopping Enigma2:
 		plutoScheduler.stop()
+		plutoScheduler.detach()
+		plutoUpdateCoordinator.cancel()  # A running update must not hold up the shutdown.
+		plutoEPGCommitter.detach()
+		plutoBandwidth.detach()
+		plutoWorkers.stop(PLUTO_SHUTDOWN_WAIT)
 
 
 def Plugins(**kwargs):
@@ -2297,4 +3706,9 @@ def Plugins(**kwargs):
 	return plugin
 
 
+plutoWorkers = PlutoWorkers()
+plutoRateLimiter = PlutoRateLimiter()
+plutoEPGCommitter = PlutoEPGCommitter()
+plutoBandwidth = PlutoBandwidth()
+plutoUpdateCoordinator = PlutoUpdateCoordinator()
 plutoScheduler = PlutoScheduler()